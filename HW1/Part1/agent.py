@@ -9,8 +9,6 @@
 # Modified by Rahul Kunji (rahulsk2@illinois.edu) on 01/16/2019
 # Modified by Shang-Tse Chen (stchen@csie.ntu.edu.tw) on 03/03/2022
 
-import pygame
-
 # The agent is only used when a human player is used, and is therefore not annotated much
 class Agent():
     def __init__(self, pos, maze, blockSizeX, blockSizeY):
@@ -19,16 +17,28 @@ class Agent():
         self.lastRow = None
         self.lastCol = None
         self.needsUpdate = True
+        self.changedCells = [(self.row, self.col)]
         self.color = (255, 0, 0)
         self.maze = maze
         self.blockSizeX = blockSizeX
         self.blockSizeY = blockSizeY
 
+    # Returns the cells that need redrawing since the last call (every cell left, then the
+    # current one), or an empty list if the agent hasn't moved
     def update(self):
-        if self.needsUpdate:
-            self.needsUpdate = False
-            position = (int(self.col * self.blockSizeX - self.blockSizeX / 2), int(self.row * self.blockSizeY - self.blockSizeY / 2))
-            pygame.display.flip()
+        if not self.needsUpdate:
+            return []
+        self.needsUpdate = False
+        changed = self.changedCells
+        changed.append((self.row, self.col))
+        self.changedCells = []
+        return changed
+
+    def moved(self):
+        self.lastRow = self.row
+        self.lastCol = self.col
+        self.needsUpdate = True
+        self.changedCells.append((self.row, self.col))
 
     def canMoveRight(self):
         return self.maze.isValidMove(self.row, self.col + 1)
@@ -44,30 +54,22 @@ class Agent():
 
     def moveRight(self):
         if self.canMoveRight():
-            self.lastRow = self.row
-            self.lastCol = self.col
-            self.needsUpdate = True
+            self.moved()
             self.col += 1
         
     def moveLeft(self):
         if self.canMoveLeft():
-            self.lastRow = self.row
-            self.lastCol = self.col
-            self.needsUpdate = True
+            self.moved()
             self.col -= 1
 
     def moveUp(self):
         if self.canMoveUp():
-            self.lastRow = self.row
-            self.lastCol = self.col
-            self.needsUpdate = True
+            self.moved()
             self.row -= 1
 
     def moveDown(self):
         if self.canMoveDown():
-            self.lastRow = self.row
-            self.lastCol = self.col
-            self.needsUpdate = True
+            self.moved()
             self.row += 1
 
 
@@ -0,0 +1,247 @@
+# benchmark.py
+# ---------------
+# Times every search method on the bundled maps and on larger synthetic grids,
+# and compares the numbers against a saved baseline.
+
+"""
+Runs each (map, method) case in its own process, so a method that blows up on
+a map (astar_multi on bigSearch, say) is stopped by --timeout instead of
+hanging the run. Each case is run once with stats on, for states explored
+and path length, then --repeat more times for the wall times, and last once
+under tracemalloc for the peak memory. Tracing is slow, so that run gets its
+own --timeout; if it runs out the case keeps its times and peak_memory is null.
+
+Every run starts cold: the module caches (objective_distances, jump_table,
+corridor_graph, heuristic_cache) are cleared and the map is loaded again, so
+median, p95, states explored and peak memory all include building them. Each
+timed repeat then searches the same Maze a second time with those caches warm,
+as later calls in one program would; warm_median is the median of those.
+
+The results are written as JSON to --output. With --baseline, every case is
+compared against the file and the run exits with status 1 if a case got
+slower by more than --threshold, explores more states, finds a longer path,
+or stopped working.
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from maze import load_maze
+from mazegen import write_maze
+from search import SEARCH_METHODS, SearchStats, clear_caches, search
+
+MAP_DIRS = ["single", "corner", "multi"]
+# These only go to the first objective, so they are skipped on maps with more than one
+SINGLE_GOAL = {"bfs", "astar", "bidirectional_bfs", "bidirectional_astar", "jps", "jps_plus", "corridor"}
+# (style, rows, cols) of the generated grids, each with one and with four objectives
+SYNTHETIC = [("perfect", 101, 101), ("perfect", 301, 301), ("rooms", 301, 301), ("open", 301, 301)]
+
+
+def map_cases(mapsDir, methods):
+    """
+    Returns (name, filename, method) for every .txt map under mapsDir's
+    single/corner/multi directories and every method.
+    """
+    cases = []
+    for group in MAP_DIRS:
+        directory = os.path.join(mapsDir, group)
+        if not os.path.isdir(directory):
+            continue
+        for entry in sorted(os.listdir(directory)):
+            if entry.endswith(".txt"):
+                for method in methods:
+                    cases.append((group + "/" + entry, os.path.join(directory, entry), method))
+    return cases
+
+
+def synthetic_cases(directory, methods, synthetic=SYNTHETIC, seed=0):
+    """
+    Writes the SYNTHETIC grids into directory with mazegen and returns their
+    cases. Perfect mazes get density 0.9, so there is more than one route.
+    """
+    cases = []
+    for style, rows, cols in synthetic:
+        for objectives in (1, 4):
+            name = "synthetic/%s%dx%d-%d.txt" % (style, rows, cols, objectives)
+            filename = os.path.join(directory, name.split("/")[1])
+            write_maze(filename, rows, cols, style, 0.9 if style == "perfect" else None, objectives, seed)
+            for method in methods:
+                cases.append((name, filename, method))
+    return cases
+
+
+def run_case(filename, method, repeat):
+    """
+    Runs one case in the current process and returns its result record,
+    without peak_memory (see peak_memory).
+    """
+    clear_caches()
+    try:
+        with contextlib.redirect_stdout(sys.stderr): #Maze prints its load errors
+            maze = load_maze(filename)
+    except SystemExit:
+        return {"status": "malformed"}
+    if method in SINGLE_GOAL and len(maze.getObjectivesView()) != 1:
+        return {"status": "skipped"}
+
+    path, stats = search(maze, method, stats=SearchStats(method, track_memory=False))
+    record = {
+        "status": "ok" if load_maze(filename).isValidPath(path) == "Valid" else "invalid",
+        "states_explored": stats.states_explored,
+        "path_length": stats.path_length,
+    }
+
+    times, warm = [], []
+    for _ in range(repeat):
+        clear_caches()
+        maze = load_maze(filename)
+        t = time.perf_counter()
+        search(maze, method)
+        times.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        search(maze, method)
+        warm.append(time.perf_counter() - t)
+    times.sort()
+    record["runs"] = repeat
+    record["median"] = statistics.median(times)
+    record["p95"] = times[max(0, math.ceil(0.95 * repeat) - 1)]
+    record["warm_median"] = statistics.median(warm)
+    return record
+
+
+def peak_memory(filename, method):
+    """
+    Returns the peak bytes allocated by one cold run of the case, under tracemalloc.
+    """
+    clear_caches()
+    return search(load_maze(filename), method, stats=True)[1].peak_memory
+
+
+def _case_process(connection, filename, method, repeat):
+    try:
+        record = run_case(filename, method, repeat)
+        connection.send(record)
+        if record["status"] in ("ok", "invalid"):
+            connection.send(peak_memory(filename, method))
+    except Exception as e:
+        connection.send({"status": "error", "error": repr(e)})
+    connection.close()
+
+
+def _receive(receiver, timeout):
+    # (True, message), or (False, None) if nothing came in time or the child died
+    if not receiver.poll(timeout):
+        return False, None
+    try:
+        return True, receiver.recv()
+    except EOFError:
+        return False, None
+
+
+def run_isolated(filename, method, repeat, timeout):
+    """
+    Runs run_case and then peak_memory in a child process, killing it if
+    either takes longer than timeout seconds.
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_case_process, args=(sender, filename, method, repeat))
+    process.start()
+    sender.close()
+    received, record = _receive(receiver, timeout)
+    if not received:
+        record = {"status": "timeout" if process.is_alive() else "error"}
+    elif record["status"] in ("ok", "invalid"):
+        record["peak_memory"] = _receive(receiver, timeout)[1]
+    if process.is_alive():
+        process.kill()
+    process.join()
+    if record["status"] == "error" and "error" not in record: #died without sending, e.g. out of memory
+        record["error"] = "exit code %s" % process.exitcode
+    receiver.close()
+    return record
+
+
+def compare(results, baseline, threshold=0.25, min_time=0.001):
+    """
+    Returns a list of (case, message) for every case that regressed against
+    baseline. Timing only counts when the median is both threshold (as a
+    fraction) and min_time seconds slower, so noise on tiny maps is ignored.
+    """
+    regressions = []
+    for case, new in results.items():
+        old = baseline.get(case)
+        if old is None or old["status"] != "ok":
+            continue
+        if new["status"] != "ok":
+            regressions.append((case, "status %s -> %s" % (old["status"], new["status"])))
+            continue
+        slower = new["median"] - old["median"]
+        if slower > min_time and new["median"] > old["median"] * (1 + threshold):
+            regressions.append((case, "median %.4fs -> %.4fs (+%d%%)"
+                                % (old["median"], new["median"], round(100 * slower / old["median"]))))
+        if new["states_explored"] > old["states_explored"]:
+            regressions.append((case, "states explored %d -> %d" % (old["states_explored"], new["states_explored"])))
+        if new["path_length"] > old["path_length"]:
+            regressions.append((case, "path length %d -> %d" % (old["path_length"], new["path_length"])))
+    return regressions
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmark HW1 search methods')
+
+    parser.add_argument('--maps', dest="maps", type=str, default = "maps",
+                        help='maps directory - default maps')
+    parser.add_argument('--method', dest="methods", action="append", choices = sorted(SEARCH_METHODS),
+                        help='method to run, can be repeated - default all')
+    parser.add_argument('--repeat', dest="repeat", type=int, default = 5,
+                        help='timed runs per case - default 5')
+    parser.add_argument('--timeout', dest="timeout", type=float, default = 10,
+                        help='seconds before a case is stopped - default 10')
+    parser.add_argument('--no-synthetic', dest="synthetic", default = True, action = "store_false",
+                        help='skip the generated large grids')
+    parser.add_argument('--output', dest="output", type=str, default = "benchmark.json",
+                        help='where to write the results - default benchmark.json')
+    parser.add_argument('--baseline', dest="baseline", type=str, default = None,
+                        help='previous results to compare against - default none')
+    parser.add_argument('--threshold', dest="threshold", type=float, default = 0.25,
+                        help='allowed slowdown as a fraction of the baseline median - default 0.25')
+
+    args = parser.parse_args()
+    methods = args.methods or list(SEARCH_METHODS)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cases = map_cases(args.maps, methods)
+        if args.synthetic:
+            cases += synthetic_cases(directory, methods)
+
+        results = {}
+        for name, filename, method in cases:
+            record = dict(run_isolated(filename, method, args.repeat, args.timeout), map=name, method=method)
+            results[name + ":" + method] = record
+            if record["status"] == "ok":
+                print("%-32s %-20s median %9.4fs  p95 %9.4fs  warm %9.4fs  states %7d  path %5d  peak %9s B"
+                      % (name, method, record["median"], record["p95"], record["warm_median"],
+                         record["states_explored"], record["path_length"], record["peak_memory"]))
+            elif record["status"] != "skipped":
+                print("%-32s %-20s %s" % (name, method, record["status"]))
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for case, message in regressions:
+            print("REGRESSION", case, message)
+        if regressions:
+            raise SystemExit(1)
+        print("No regressions against", args.baseline)
@@ -0,0 +1,28 @@
+# compile_maps.py
+# ---------------
+# Compiles the text mazes under a directory into the binary format read by
+# Maze.load_compiled, so repeated runs don't have to re-parse them.
+
+"""
+Converts every .txt maze under the given directories into a .mzc file next to
+it. Files that are already compiled with the current format version and are
+newer than their source are left alone.
+"""
+
+import argparse
+
+from maze import compile_maps
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Compile HW1 mazes')
+
+    parser.add_argument('directories', nargs='*', default=['maps'],
+                        help='directories to compile - default maps')
+    parser.add_argument('--adjacency', default = False, action = "store_true",
+                        help='also store the precomputed neighbor table - default False')
+
+    args = parser.parse_args()
+    for directory in args.directories:
+        for path in compile_maps(directory, args.adjacency):
+            print("Compiled", path)
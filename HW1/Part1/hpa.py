@@ -0,0 +1,281 @@
+# hpa.py
+# ---------------
+# Hierarchical path-finding (HPA*) on top of Maze, for long queries on big grids.
+
+"""
+The grid is cut into cluster x cluster blocks. Wherever two neighbouring
+blocks share a run of open cells along their border, the middle of the run is
+an entrance: a pair of cells, one on each side, one step apart. Inside every
+block the distances between its entrances (staying inside the block) are
+computed once. A query then runs A* on that small graph of entrances, with the
+start and goal hooked up to the entrances of their own blocks, and only the
+chosen hops are refined into cells with SearchContext.astar. So a query across
+the whole map expands roughly the entrances it passes plus the cells of the
+path, not the whole map.
+
+Paths are valid but not always shortest: a path can only change blocks at
+entrances, so it may be longer than optimal. With cluster 8 on generated
+81x81 maps, perfect and rooms mazes came out shortest, but open grids were up
+to about 20% longer, since the wide borders there have one entrance each
+however open they are. Queries within one
+block or between neighbouring blocks skip the abstraction and run
+SearchContext.astar directly, since that's where the detour would matter most.
+
+The abstraction can be saved to and loaded from a JSON file, checked against
+the maze's grid key. With watch(), wall changes on the maze mark their block as
+dirty and only dirty blocks (and neighbours whose entrances moved) are redone
+before the next query.
+"""
+
+import heapq
+import json
+from collections import deque
+
+from search import SearchContext
+
+HPA_VERSION = 1
+START, GOAL = -1, -2 #ids of the query's own start and goal in the abstract graph
+
+
+class Abstraction:
+    def __init__(self, maze, cluster=16, build=True):
+        """
+        @param maze: the Maze to abstract
+        @param cluster: block size in cells
+        @param build: False leaves the graph empty (used by load)
+        """
+        self.maze = maze
+        self.rows, self.cols = maze.getDimensions()
+        self.cluster = cluster
+        self.cluster_rows = -(-self.rows // cluster)
+        self.cluster_cols = -(-self.cols // cluster)
+        self.transitions = {} #(cluster, right or lower cluster) -> [(cell, cell on the other side)], walled-off borders left out
+        self.partners = {} #entrance cell -> cells one step away in the neighbouring blocks
+        self.edges = [{} for _ in range(self.cluster_rows * self.cluster_cols)] #per block: cell -> [(cell, distance)]
+        self.dirty = set()
+        self.context = SearchContext(maze)
+        self.expanded = 0 #abstract nodes expanded by the last query
+        if build:
+            for c in range(len(self.edges)):
+                for other in self._borders(c):
+                    if other > c:
+                        self._build_border(c, other)
+            for c in range(len(self.edges)):
+                self._build_cluster(c)
+
+    def path(self, start=None, goal=None):
+        """
+        Returns a path from start to goal (default: the maze's start and first
+        objective), [] if there is none. Rebuilds dirty blocks first.
+        """
+        self.update()
+        start = self.maze.getStart() if start is None else start
+        goal = self.maze.getObjectives()[0] if goal is None else goal
+        cols = self.cols
+        s, t = start[0] * cols + start[1], goal[0] * cols + goal[1]
+        cs, ct = self.cluster_of(s), self.cluster_of(t)
+        if cs == ct or ct in self._borders(cs): #short query, the detour through entrances isn't worth it
+            return self.context.astar(start, goal)
+
+        from_start = self._distances(cs, s)
+        to_goal = self._distances(ct, t)
+        start_edges = [(node, from_start[node]) for node in self.edges[cs] if node in from_start]
+        if t in from_start:
+            start_edges.append((GOAL, from_start[t]))
+        goal_edges = {node: to_goal[node] for node in self.edges[ct] if node in to_goal}
+
+        hops = self._search(s, t, start_edges, goal_edges)
+        if hops is None:
+            return []
+        path = [start]
+        for a, b in zip(hops, hops[1:]):
+            if b in self.partners.get(a, ()):
+                path.append(divmod(b, cols))
+            elif a != b:
+                path.extend(self.context.astar(divmod(a, cols), divmod(b, cols))[1:])
+        return path
+
+    # A* over the entrances; returns the cells of the chosen hops, s first and t last
+    def _search(self, s, t, start_edges, goal_edges):
+        cols = self.cols
+        tr, tc = divmod(t, cols)
+        def h(node):
+            r, c = divmod(node, cols)
+            return abs(r - tr) + abs(c - tc)
+        g = {START: 0}
+        parent = {START: None}
+        heap = [(h(s), 0, START)]
+        closed = set()
+        self.expanded = 0
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node in closed:
+                continue
+            closed.add(node)
+            self.expanded += 1
+            if node == GOAL:
+                hops = []
+                while node is not None:
+                    hops.append(t if node == GOAL else s if node == START else node)
+                    node = parent[node]
+                return hops[::-1]
+            if node == START:
+                neighbors = start_edges
+            else:
+                neighbors = [(other, 1) for other in self.partners.get(node, ())]
+                neighbors += self.edges[self.cluster_of(node)][node]
+                if node in goal_edges:
+                    neighbors.append((GOAL, goal_edges[node]))
+            for other, d in neighbors:
+                new = cost + d
+                if other not in closed and new < g.get(other, new + 1):
+                    g[other] = new
+                    parent[other] = node
+                    heapq.heappush(heap, (new + (0 if other == GOAL else h(other)), new, other))
+        return None
+
+    def cluster_of(self, cell):
+        row, col = divmod(cell, self.cols)
+        return row // self.cluster * self.cluster_cols + col // self.cluster
+
+    # (first row, end row, first col, end col) of a block
+    def _bounds(self, c):
+        ci, cj = divmod(c, self.cluster_cols)
+        k = self.cluster
+        return ci * k, min((ci + 1) * k, self.rows), cj * k, min((cj + 1) * k, self.cols)
+
+    def _borders(self, c):
+        ci, cj = divmod(c, self.cluster_cols)
+        return ([c - self.cluster_cols] if ci > 0 else []) + ([c + self.cluster_cols] if ci + 1 < self.cluster_rows else []) \
+            + ([c - 1] if cj > 0 else []) + ([c + 1] if cj + 1 < self.cluster_cols else [])
+
+    # BFS from cell that stays inside block c: {cell: distance}
+    def _distances(self, c, source):
+        r0, r1, c0, c1 = self._bounds(c)
+        cols = self.cols
+        dist = {source: 0}
+        queue = deque([source])
+        getNeighborIds = self.maze.getNeighborIds
+        while queue:
+            current = queue.popleft()
+            d = dist[current] + 1
+            for neighbor in getNeighborIds(current):
+                if neighbor not in dist and r0 <= neighbor // cols < r1 and c0 <= neighbor % cols < c1:
+                    dist[neighbor] = d
+                    queue.append(neighbor)
+        return dist
+
+    # Finds the entrances on the border between block a and the block b to its
+    # right or below it. Returns True if they changed.
+    def _build_border(self, a, b):
+        r0, r1, c0, c1 = self._bounds(a)
+        cols = self.cols
+        if b == a + self.cluster_cols: #b is below (also a + 1 when there is one column of blocks)
+            pairs = [((r1 - 1) * cols + col, r1 * cols + col) for col in range(c0, c1)]
+        else: #b is to the right
+            pairs = [(row * cols + c1 - 1, row * cols + c1) for row in range(r0, r1)]
+        isWall = self.maze.isWall
+        transitions = []
+        run = []
+        for pair in pairs + [None]:
+            if pair is not None and not isWall(*divmod(pair[0], cols)) and not isWall(*divmod(pair[1], cols)):
+                run.append(pair)
+            elif run:
+                transitions.append(run[len(run) // 2])
+                run = []
+        old = self.transitions.get((a, b), [])
+        if old == transitions:
+            return False
+        for x, y in old:
+            self.partners[x].remove(y)
+            self.partners[y].remove(x)
+        for x, y in transitions:
+            self.partners.setdefault(x, []).append(y)
+            self.partners.setdefault(y, []).append(x)
+        if transitions:
+            self.transitions[(a, b)] = transitions
+        else:
+            del self.transitions[(a, b)]
+        return True
+
+    # Recomputes the distances between the entrances of block c
+    def _build_cluster(self, c):
+        nodes = set()
+        for other in self._borders(c):
+            for x, y in self.transitions.get((min(c, other), max(c, other)), ()):
+                nodes.add(x if other > c else y)
+        edges = {}
+        for node in nodes:
+            dist = self._distances(c, node)
+            edges[node] = [(other, dist[other]) for other in nodes if other != node and other in dist]
+        self.edges[c] = edges
+
+    def watch(self):
+        """Starts following the maze's wall changes (see update)."""
+        self.maze.addWallListener(self._wall_changed)
+
+    def close(self):
+        """Stops following the maze's wall changes."""
+        self.maze.removeWallListener(self._wall_changed)
+
+    def _wall_changed(self, row, col, isWall):
+        self.dirty.add(self.cluster_of(row * self.cols + col))
+
+    def update(self):
+        """
+        Redoes the blocks marked dirty by wall changes: their borders, their own
+        distances, and the distances of neighbours whose entrances moved.
+        """
+        if not self.dirty:
+            return
+        rebuild = set(self.dirty)
+        for c in self.dirty:
+            for other in self._borders(c):
+                if self._build_border(min(c, other), max(c, other)):
+                    rebuild.add(other)
+        for c in rebuild:
+            self._build_cluster(c)
+        self.dirty.clear()
+
+    def save(self, filename):
+        """Writes the abstraction to a JSON file, tagged with the maze's grid key."""
+        self.update()
+        with open(filename, "w") as f:
+            json.dump({
+                "version": HPA_VERSION,
+                "grid": self.maze.getGridKey(),
+                "cluster": self.cluster,
+                "transitions": [[a, b, pairs] for (a, b), pairs in sorted(self.transitions.items())],
+                "edges": [[[node, other, d] for node, hops in sorted(edges.items()) for other, d in hops]
+                          for edges in self.edges],
+            }, f)
+
+    @classmethod
+    def load(cls, filename, maze):
+        """
+        Reads an abstraction written by save for maze. Raises ValueError if it
+        was written by another version or for different walls.
+        """
+        with open(filename) as f:
+            data = json.load(f)
+        if data.get("version") != HPA_VERSION:
+            raise ValueError("%s has abstraction version %s, expected %d" % (filename, data.get("version"), HPA_VERSION))
+        if data["grid"] != maze.getGridKey():
+            raise ValueError("%s was built for a different maze" % filename)
+        abstraction = cls(maze, data["cluster"], build=False)
+        for a, b, pairs in data["transitions"]:
+            abstraction.transitions[(a, b)] = [tuple(pair) for pair in pairs]
+            for x, y in pairs:
+                abstraction.partners.setdefault(x, []).append(y)
+                abstraction.partners.setdefault(y, []).append(x)
+        for c, triples in enumerate(data["edges"]):
+            edges = {}
+            for node, other, d in triples:
+                edges.setdefault(node, []).append((other, d))
+            abstraction.edges[c] = edges
+        # entrances with no reachable neighbour in their block still need an entry
+        for (a, b), pairs in abstraction.transitions.items():
+            for x, y in pairs:
+                abstraction.edges[a].setdefault(x, [])
+                abstraction.edges[b].setdefault(y, [])
+        return abstraction
@@ -17,15 +17,17 @@ game and the search algorithm.
 import pygame
 import sys
 import argparse
+import json
 import time
 
 from pygame.locals import *
 from agent import Agent
-from maze import Maze
-from search import search
+from maze import load_maze
+from search import search, search_steps
+from render import render_png
 
 class Application:
-    def __init__(self, human=True, scale=20, fps=30,alt_color=False):
+    def __init__(self, human=True, scale=20, fps=30,alt_color=False, headless=False, animate=False, stats=None):
         self.running = True
         self.displaySurface = None
         self.scale = scale
@@ -33,12 +35,15 @@ class Application:
         self.windowTitle = "HW1: "
         self.__human = human
         self.alt_color = alt_color
+        self.headless = headless
+        self.animate = animate
+        self.stats = stats
 
     # Initializes the pygame context and certain properties of the maze
     def initialize(self, filename):
         self.windowTitle += filename
 
-        self.maze = Maze(filename)
+        self.maze = load_maze(filename)
         self.gridDim = self.maze.getDimensions()
 
         self.windowHeight = self.gridDim[0] * self.scale
@@ -59,20 +64,47 @@ class Application:
             print("No maze created")
             raise SystemExit
 
-        if not self.__human:
+        if self.animate and (self.__human or self.headless or searchMethod not in ("bfs", "astar")):
+            print("--animate only works with --method bfs or astar, without --human or --headless")
+            raise SystemExit
+
+        if self.headless and (self.__human or save is None):
+            print("--headless needs --save and can't be used with --human")
+            raise SystemExit
+
+        if not self.__human and not self.animate:
             t1 = time.time()
-            path = search(self.maze, searchMethod)
+            if self.stats is None:
+                path = search(self.maze, searchMethod)
+            else:
+                path, stats = search(self.maze, searchMethod, stats=True)
             total_time = time.time()-t1  #time in seconds
             statesExplored = self.maze.getStatesExplored()
+            if self.stats is not None:
+                self.writeStats(filename, stats)
         else:
             path, statesExplored = [], 0
 
+        # Headless mode writes the image straight to the file, no window or display needed
+        if self.headless:
+            print("Results")
+            print("Path Length:", len(path))
+            print("States Explored:", statesExplored)
+            print("Total time", total_time,"seconds")
+            render_png(self.maze, path, save, self.scale, self.alt_color)
+            return
+
         pygame.init()
         self.displaySurface = pygame.display.set_mode((self.windowWidth, self.windowHeight), pygame.HWSURFACE)
         self.displaySurface.fill((255, 255, 255))
         pygame.display.flip()
         pygame.display.set_caption(self.windowTitle)
 
+        self.staticLayer = self.buildStaticLayer()
+
+        if self.animate:
+            path, statesExplored, total_time = self.animateSearch(searchMethod) #explored cells stay under the path
+
         if self.__human:
             self.drawPlayer()
         else:
@@ -82,8 +114,7 @@ class Application:
             print("Total time", total_time,"seconds")
             self.drawPath(path)
 
-        self.drawMaze()
-        self.drawStart()
+        self.displaySurface.blit(self.staticLayer, (0, 0))
         self.drawObjective()
 
         pygame.display.flip()
@@ -121,13 +152,81 @@ class Application:
                 self.gameLoop()
 
 
+    # Writes the search stats as one JSON object, to stdout for "-"
+    def writeStats(self, filename, stats):
+        record = dict(stats.to_dict(), filename=filename)
+        if self.stats == "-":
+            print(json.dumps(record))
+        else:
+            with open(self.stats, "w") as f:
+                json.dump(record, f, indent=2)
+
     # The game loop is where everything is drawn to the context. Only called when a human is playing
+    # Only the cells the agent moved through since the last tick are redrawn and pushed to the
+    # screen, so a frame costs the same on any map size (and nothing when the agent stands still)
     def gameLoop(self):
+        changed = self.agent.update()
+        if not changed:
+            return
+        position = (self.agent.row, self.agent.col)
+        for row, col in changed:
+            if (row, col) != position:
+                self.drawCircle(row, col, (0, 0, 255))
+        self.drawCircle(position[0], position[1], self.agent.color)
+        pygame.display.update([self.cellRect(row, col) for row, col in changed])
+
+    # Runs the search step by step (search_steps) and shows the expanded and frontier cells live.
+    # The search runs flat out between frames; cells touched in between are coalesced and drawn
+    # once per frame, at most fps frames per second. Returns (path, states explored, total time).
+    def animateSearch(self, searchMethod):
+        self.displaySurface.blit(self.staticLayer, (0, 0))
         self.drawObjective()
-        self.drawPlayer()
-        self.agent.update()
         pygame.display.flip()
 
+        frontierColor, expandedColor = (190, 190, 255), (150, 150, 150)
+        frameTime = 1.0 / self.fps
+        pending = {} # cell -> color, drawn at the next frame
+        path = []
+        t1 = time.time()
+        nextFrame = t1 + frameTime
+        for step in search_steps(self.maze, searchMethod):
+            for cell in step.frontier:
+                pending[cell] = frontierColor
+            for cell in step.expanded:
+                pending[cell] = expandedColor
+            if step.path is not None:
+                path = step.path
+            if time.time() >= nextFrame:
+                self.drawPending(pending)
+                pending = {}
+                pygame.event.pump()
+                nextFrame = time.time() + frameTime
+        self.drawPending(pending)
+        total_time = time.time() - t1 #includes the drawing
+        return path, self.maze.getStatesExplored(), total_time
+
+    # Draws the coalesced cells of one animation frame and pushes just those to the screen
+    def drawPending(self, pending):
+        for (row, col), color in pending.items():
+            self.drawSquare(row, col, color)
+        pygame.display.update([self.cellRect(row, col) for row, col in pending])
+
+    # Draws the walls and the start once onto a layer that is blitted over the path (white is
+    # transparent), instead of issuing one draw call per wall every time the maze is drawn
+    def buildStaticLayer(self):
+        layer = pygame.Surface((self.windowWidth, self.windowHeight))
+        layer.fill((255, 255, 255))
+        layer.set_colorkey((255, 255, 255))
+        display, self.displaySurface = self.displaySurface, layer # the draw helpers paint on displaySurface
+        self.drawMaze()
+        self.drawStart()
+        self.displaySurface = display
+        return layer
+
+    # Screen area covered by a cell
+    def cellRect(self, row, col):
+        return pygame.Rect(col * self.blockSizeX, row * self.blockSizeY, self.blockSizeX, self.blockSizeY)
+
     # Implementation of a color scheme for the path taken
     # If Red-Green does not work for you while debugging (for e.g. color blindness),
     # you can edit the start and end colors by picking appropriate (R, G, B) values
@@ -182,7 +281,7 @@ class Application:
 
     # Draws the objectives to the display context
     def drawObjective(self):
-        for obj in self.maze.getObjectives():
+        for obj in self.maze.getObjectivesView():
             self.drawCircle(obj[0], obj[1], (0, 0, 0))
 
     # Draws start location of path
@@ -202,9 +301,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='HW1 Search')
 
     parser.add_argument('filename',
-                        help='path to maze file [REQUIRED]')
+                        help='path to maze file, text or compiled .mzc [REQUIRED]')
     parser.add_argument('--method', dest="search", type=str, default = "bfs",
-                        choices = ["bfs", "astar_corner", "astar", "fast", "astar_multi"],
+                        choices = ["bfs", "astar_corner", "astar", "fast", "astar_multi",
+                                   "bidirectional_bfs", "bidirectional_astar", "jps", "jps_plus", "corridor"],
                         help='search method - default bfs')
     parser.add_argument('--scale', dest="scale", type=int, default = 20,
                         help='scale - default: 20')
@@ -216,8 +316,14 @@ if __name__ == "__main__":
                         help='save output to image file - default not saved')
     parser.add_argument('--altcolor', dest="altcolor", default = False, action = "store_true",
                         help='View in an alternate color scheme.')
+    parser.add_argument('--headless', default = False, action = "store_true",
+                        help='render the result to the --save file without opening a window - default False')
+    parser.add_argument('--animate', default = False, action = "store_true",
+                        help='show bfs/astar expansions live, at most --fps frames per second - default False')
+    parser.add_argument('--stats', dest="stats", type=str, default = None,
+                        help='write search stats as JSON to this file, "-" for stdout - default not written')
 
 
     args = parser.parse_args()
-    app = Application(args.human, args.scale, args.fps,args.altcolor)
+    app = Application(args.human, args.scale, args.fps,args.altcolor, args.headless, args.animate, args.stats)
     app.execute(args.filename, args.search, args.save)
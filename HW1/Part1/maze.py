@@ -15,52 +15,300 @@ a representation of the maze that is exposed through a simple interface.
 
 from operator import pos
 import re
-import copy
-from collections import Counter
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+
+# (row, col) offsets of the four moves, in the order getNeighbors returns them
+_MOVES = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+# Bytes matched by the \s in the blank line filter (besides the newlines)
+_BLANK = b' \t\x0b\x0c\x1c\x1d\x1e\x1f'
+
+# Reads a maze file into (rows, cols, grid), where grid is a flat row-major
+# bytearray with one byte per cell.
+# The file is memory-mapped: when every line ends in '\n' at the same stride the
+# rows are copied straight out of the map and checked with strided slices;
+# anything else (blank lines, '\r\n', ragged rows) goes through the line-by-line
+# reader below, which is also where "Maze dimensions incorrect" is reported.
+def _readGrid(filename):
+    with open(filename, 'rb') as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # empty file, can't be mapped
+            buf = None
+        if buf is not None:
+            with buf:
+                grid = _mappedGrid(buf)
+            if grid is not None:
+                return grid
+
+    with open(filename) as f:
+        lines = f.readlines()
+
+    lines = list(filter(lambda x: not re.match(r'^\s*$', x), lines))
+    lines = [line.strip('\n') for line in lines]
+#看到這兒而兒兒而兒而兒而兒而
+    rows = len(lines)
+    cols = len(lines[0])
+
+    # 檢查所有行是否長度一致
+    for row in lines:
+        if len(row) != cols:
+            print("Maze dimensions incorrect")
+            raise SystemExit
+
+    return rows, cols, bytearray(''.join(lines), 'latin-1')
+
+# Fast path of _readGrid, returns None whenever the file isn't a plain grid of
+# equal '\n'-terminated rows
+def _mappedGrid(buf):
+    size = len(buf)
+    cols = buf.find(b'\n')
+    if cols <= 0 or buf.find(b'\r') != -1:
+        return None
+    stride = cols + 1
+    if buf[size - 1] != ord('\n'):
+        size += 1 # last row without a trailing newline
+    if size % stride != 0:
+        return None
+    rows = size // stride
+    # every row has its newline exactly at the stride...
+    if buf[cols::stride] != b'\n' * (len(buf) // stride):
+        return None
+
+    view = memoryview(buf)
+    grid = bytearray(rows * cols)
+    for row in range(rows):
+        grid[row * cols:(row + 1) * cols] = view[row * stride:row * stride + cols]
+    view.release()
+    # a stray newline inside a row would mean the rows aren't all the same length
+    if grid.find(b'\n') != -1:
+        return None
+    # blank lines are skipped by the slow path, so leave those files to it too
+    # (only rows starting with whitespace can be blank)
+    firstChars = grid[0::cols]
+    if len(firstChars.translate(None, _BLANK)) != rows:
+        for row in range(rows):
+            if firstChars[row] in _BLANK and not grid[row * cols:(row + 1) * cols].translate(None, _BLANK):
+                return None
+    return rows, cols, grid
+
+# Compiled maze format (see Maze.save_compiled), bump the version whenever the
+# layout changes so old caches are rejected instead of misread
+COMPILED_VERSION = 1
+COMPILED_SUFFIX = '.mzc'
+_MAGIC = b'MZC1'
+_HEADER = struct.Struct('<4sHHIIiiI')
+_FLAG_ADJACENCY = 1
+
+# '%' -> 1, everything else -> 0
+_WALL_BITS = bytes(1 if b == ord('%') else 0 for b in range(256))
+# 1 -> '%', 0 -> ' ' (the inverse of _WALL_BITS on an unpacked grid)
+_WALL_CHARS = bytes([ord(' '), ord('%')]) + bytes(254)
+# bit k of a packed byte -> 0/1 byte, one table per k
+_UNPACK_TABLES = [bytes(b >> k & 1 for b in range(256)) for k in range(8)]
+# 0/1 byte -> the value of bit k
+_PACK_TABLES = [bytes((b & 1) << k for b in range(256)) for k in range(8)]
+
+# Packs a sequence of 0/1 bytes 8 per byte (cell i is bit i % 8 of byte i // 8).
+# Each of the 8 bit planes is a strided slice, so the work stays in C. Also used
+# by search.distance_field for its bitsets.
+def packBits(bits):
+    nbytes = (len(bits) + 7) // 8
+    bits = bytes(bits) + bytes(nbytes * 8 - len(bits))
+    packed = 0
+    for k in range(8):
+        packed |= int.from_bytes(bits[k::8].translate(_PACK_TABLES[k]), 'little')
+    return packed.to_bytes(nbytes, 'little')
+
+# Inverse of packBits: the first count bits of packed as a bytearray of 0/1
+def unpackBits(packed, count):
+    bits = bytearray(len(packed) * 8)
+    for k in range(8):
+        bits[k::8] = packed.translate(_UNPACK_TABLES[k])
+    del bits[count:]
+    return bits
+
+# Compiles every .txt maze under directory (recursively) next to its source,
+# skipping the ones whose compiled file is newer and of the current version and
+# the ones that fail to load.
+# Returns the list of files written.
+def compile_maps(directory, withAdjacency=False):
+    written = []
+    for root, _, files in sorted(os.walk(directory)):
+        for name in sorted(files):
+            if not name.endswith('.txt'):
+                continue
+            source = os.path.join(root, name)
+            target = source[:-len('.txt')] + COMPILED_SUFFIX
+            if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+                try:
+                    Maze.load_compiled(target)
+                    continue
+                except ValueError:
+                    pass # stale, compile it again
+            try:
+                maze = Maze(source)
+            except SystemExit: # malformed map, already reported
+                continue
+            maze.save_compiled(target, withAdjacency)
+            written.append(target)
+    return written
+
+# Loads a maze from either a text map or a compiled .mzc file
+def load_maze(filename):
+    if filename.endswith(COMPILED_SUFFIX):
+        return Maze.load_compiled(filename)
+    return Maze(filename)
 
 class Maze:
     # Initializes the Maze object by reading the maze from a file
     def __init__(self, filename):
+        self.__initFields(filename)
+
+        self.rows, self.cols, self.__grid = _readGrid(filename)
+
+        # 用bytes.find直接在grid上找起點跟目標，不用一格一格掃
+        # (rfind: if there are several 'P' the last one wins, as it always did)
+        cols = self.cols
+        start = self.__grid.rfind(ord(self.__startChar))
+        if start != -1:
+            self.__start = divmod(start, cols)
+        objectives = []
+        cell = self.__grid.find(ord(self.__objectiveChar))
+        while cell != -1:
+            objectives.append(divmod(cell, cols))
+            cell = self.__grid.find(ord(self.__objectiveChar), cell + 1)
+        self.setObjectives(objectives)
+
+    # Sets up everything that doesn't depend on the grid itself
+    def __initFields(self, filename):
         self.__filename = filename
         self.__wallChar = '%'
         self.__startChar = 'P'
         self.__objectiveChar = '.'
         self.__start = None
         self.__objective = []
+        self.__objectiveSet = frozenset()
+        self.__objectiveView = ()
         self.__states_explored = 0
+        self.__adjacency = None
+        self.__gridKey = None
+        self.__wallVersion = 0
+        self.__wallListeners = []
+        self.__mazeRaw = None
 
-        with open(filename) as f:
-            lines = f.readlines()
+    # Writes the maze to a compiled binary file that load_compiled can read back:
+    # a header (format version, dimensions, start, objective count), the objective
+    # cell ids and the walls packed 8 cells per byte. With withAdjacency the
+    # neighbor table is stored too, so loading doesn't have to rebuild it.
+    def save_compiled(self, filename, withAdjacency=False):
+        flags = 0
+        if withAdjacency:
+            if self.__adjacency is None:
+                self.__buildAdjacency()
+            flags |= _FLAG_ADJACENCY
+        start = self.__start if self.__start is not None else (-1, -1)
+        objectives = array('I', [row * self.cols + col for row, col in self.__objective])
+        with open(filename, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, COMPILED_VERSION, flags, self.rows, self.cols,
+                                 start[0], start[1], len(objectives)))
+            f.write(objectives.tobytes())
+            f.write(packBits(self.__grid.translate(_WALL_BITS)))
+            if withAdjacency:
+                f.write(self.__adjacency)
 
-        lines = list(filter(lambda x: not re.match(r'^\s*$', x), lines))
-        lines = [list(line.strip('\n')) for line in lines]
-#看到這兒而兒兒而兒而兒而兒而
-        self.rows = len(lines)
-        self.cols = len(lines[0])
-        self.mazeRaw = lines
-
-        # 檢查所有行是否長度一致
-        for row in lines:
-            if len(row) != self.cols:
-                print("Maze dimensions incorrect")
-                raise SystemExit
-
-        for row in range(len(self.mazeRaw)):
-            for col in range(len(self.mazeRaw[0])):
-                if self.mazeRaw[row][col] == self.__startChar:
-                    self.__start = (row, col)
-                elif self.mazeRaw[row][col] == self.__objectiveChar:
-                    self.__objective.append((row, col))
+    # Reads a maze written by save_compiled. Raises ValueError if the file isn't a
+    # compiled maze, was written by another format version (a stale cache) or is
+    # shorter than its header says (cut off while being written or copied).
+    @classmethod
+    def load_compiled(cls, filename):
+        with open(filename, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size or header[:4] != _MAGIC:
+                raise ValueError(filename + " is not a compiled maze")
+            _, version, flags, rows, cols, startRow, startCol, count = _HEADER.unpack(header)
+            if version != COMPILED_VERSION:
+                raise ValueError("%s was compiled with format version %d, expected %d"
+                                 % (filename, version, COMPILED_VERSION))
+            sizes = [4 * count, (rows * cols + 7) // 8, rows * cols if flags & _FLAG_ADJACENCY else 0]
+            sections = [f.read(size) for size in sizes]
+            if [len(section) for section in sections] != sizes:
+                raise ValueError(filename + " is truncated")
+            objectives = array('I')
+            objectives.frombytes(sections[0])
+            packed = sections[1]
+            adjacency = bytearray(sections[2]) if flags & _FLAG_ADJACENCY else None
+
+        maze = cls.__new__(cls)
+        maze.__initFields(filename)
+        maze.rows, maze.cols = rows, cols
+        grid = unpackBits(packed, rows * cols).translate(_WALL_CHARS)
+        if startRow >= 0:
+            maze.__start = (startRow, startCol)
+            grid[startRow * cols + startCol] = ord(maze.__startChar)
+        for cell in objectives:
+            grid[cell] = ord(maze.__objectiveChar)
+        maze.setObjectives([divmod(cell, cols) for cell in objectives])
+        maze.__grid = grid
+        if adjacency is not None:
+            maze.__setAdjacency(adjacency)
+        return maze
+
+    # Returns the maze as a list of character lists. It is built from the packed grid
+    # on first access and kept until a wall changes, so don't edit it -- use setWall
+    @property
+    def mazeRaw(self):
+        if self.__mazeRaw is None:
+            row_bytes = [self.__grid[i:i + self.cols] for i in range(0, len(self.__grid), self.cols)]
+            self.__mazeRaw = [list(row.decode('latin-1')) for row in row_bytes]
+        return self.__mazeRaw
+
+    # Builds the neighbor table: one byte per cell whose bits say which of the
+    # four moves (down, up, right, left -- the order getNeighbors always used) stay
+    # inside the maze and off the walls
+    # 只建一次，第一次有人要鄰居的時候才建
+    def __buildAdjacency(self):
+        grid = self.__grid
+        rows, cols = self.rows, self.cols
+        wall = ord(self.__wallChar)
+        adjacency = bytearray(rows * cols)
+        cell = 0
+        for row in range(rows):
+            for col in range(cols):
+                mask = 0
+                if row + 1 < rows and grid[cell + cols] != wall:
+                    mask |= 1
+                if row > 0 and grid[cell - cols] != wall:
+                    mask |= 2
+                if col + 1 < cols and grid[cell + 1] != wall:
+                    mask |= 4
+                if col > 0 and grid[cell - 1] != wall:
+                    mask |= 8
+                adjacency[cell] = mask
+                cell += 1
+        self.__setAdjacency(adjacency)
+
+    def __setAdjacency(self, adjacency):
+        cols = self.cols
+        # moves and cell id offsets for every possible mask value
+        self.__maskMoves = tuple(tuple(_MOVES[k] for k in range(4) if mask >> k & 1) for mask in range(16))
+        idOffsets = (cols, -cols, 1, -1)
+        self.__maskOffsets = tuple(tuple(idOffsets[k] for k in range(4) if mask >> k & 1) for mask in range(16))
+        self.__adjacency = adjacency
 
     # Returns True if the given position is the location of a wall
     # 是否為牆壁
     def isWall(self, row, col):
-        return self.mazeRaw[row][col] == self.__wallChar
+        return self.__grid[row * self.cols + col] == ord(self.__wallChar)
 
     # Rturns True if the given position is the location of an objective
     # 檢查該位置是否為目標
     def isObjective(self, row, col):
-        return (row, col) in self.__objective
+        return (row, col) in self.__objectiveSet
 
     # Returns the start position as a tuple of (row, column)
     # 返回起點座標
@@ -77,13 +325,85 @@ class Maze:
         return (self.rows, self.cols)
 
     # Returns the list of objective positions of the maze
-    #回去目標座標的列表，deepcopy是為了避免外部修改目標列表，造成迷宮物件內部狀態不一致
+    #回去目標座標的列表，複製一份是為了避免外部修改目標列表，造成迷宮物件內部狀態不一致
+    #(positions are tuples, so a shallow copy is as safe as the deepcopy it used to be)
     def getObjectives(self):
-        return copy.deepcopy(self.__objective)
+        return list(self.__objective)
+
+    # Returns the objective positions as a read-only tuple, without copying
+    # 只要讀不要改的話(例如每一幀都要畫目標點)用這個就好
+    def getObjectivesView(self):
+        return self.__objectiveView
+
+    # Returns the objective positions as a frozenset, for O(1) membership tests
+    def getObjectiveSet(self):
+        return self.__objectiveSet
 
     #就是設定下一棵要去吃的點點
+    #list、tuple跟set要一起更新，不然isObjective跟getObjectives會對不起來
     def setObjectives(self, objectives):
-        self.__objective = objectives
+        self.__objective = list(objectives)
+        self.__objectiveView = tuple(self.__objective)
+        self.__objectiveSet = frozenset(self.__objective)
+
+    # Returns the walls as bytes, one per cell in row-major order: 1 for a wall, 0 otherwise
+    def getWallMask(self):
+        return bytes(self.__grid.translate(_WALL_BITS))
+
+    # Puts a wall on / removes the wall from the given cell. Returns False if the
+    # cell already was that way. The neighbor table is patched in place, the grid
+    # key is dropped (so caches keyed on it rebuild) and every wall listener is
+    # called as listener(row, col, isWall).
+    # 起點跟目標上不能放牆
+    def setWall(self, row, col):
+        if (row, col) == self.__start or (row, col) in self.__objectiveSet:
+            raise ValueError("Can't put a wall on the start or an objective: %s" % ((row, col),))
+        return self.__changeWall(row, col, True)
+
+    def clearWall(self, row, col):
+        return self.__changeWall(row, col, False)
+
+    def __changeWall(self, row, col, isWall):
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            raise IndexError("Cell %s is outside the maze" % ((row, col),))
+        if self.isWall(row, col) == isWall:
+            return False
+        cols = self.cols
+        cell = row * cols + col
+        self.__grid[cell] = ord(self.__wallChar if isWall else ' ')
+        if self.__adjacency is not None:
+            # the moves *into* this cell change: bit of the opposite move on each neighbor
+            adjacency = self.__adjacency
+            for neighbor, bit, inside in ((cell - cols, 1, row > 0), (cell + cols, 2, row + 1 < self.rows),
+                                          (cell - 1, 4, col > 0), (cell + 1, 8, col + 1 < cols)):
+                if inside:
+                    adjacency[neighbor] = adjacency[neighbor] & ~bit if isWall else adjacency[neighbor] | bit
+        self.__gridKey = None
+        self.__mazeRaw = None
+        self.__wallVersion += 1
+        for listener in list(self.__wallListeners):
+            listener(row, col, isWall)
+        return True
+
+    # Returns a counter bumped on every wall change
+    def getWallVersion(self):
+        return self.__wallVersion
+
+    # Registers / unregisters a callable notified of wall changes (see setWall)
+    def addWallListener(self, listener):
+        self.__wallListeners.append(listener)
+
+    def removeWallListener(self, listener):
+        self.__wallListeners.remove(listener)
+
+    # Returns a digest of the wall layout and dimensions, used to key caches of
+    # anything derived from the grid (it doesn't change with start/objectives)
+    def getGridKey(self):
+        if self.__gridKey is None:
+            digest = hashlib.blake2b(self.getWallMask(), digest_size=16)
+            digest.update(struct.pack('<II', self.rows, self.cols))
+            self.__gridKey = digest.hexdigest()
+        return self.__gridKey
 
     #返回探索的狀態數量，作為評估演算法效率的指標
     ##有點不懂
@@ -98,20 +418,43 @@ class Maze:
     # Returns list of neighboing squares that can be moved to from the given row,col
     #返回鄰近可移動的方格列表
     def getNeighbors(self, row, col):
-        possibleNeighbors = [
-            (row + 1, col),
-            (row - 1, col),
-            (row, col + 1),
-            (row, col - 1)
-        ]
-        neighbors = [] ##建立一個空的鄰居列表
-        for r, c in possibleNeighbors:
-            if self.isValidMove(r,c):
-                neighbors.append((r,c)) ##append是把符合條件的鄰居加入列表
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            possibleNeighbors = [
+                (row + 1, col),
+                (row - 1, col),
+                (row, col + 1),
+                (row, col - 1)
+            ]
+            neighbors = [] ##建立一個空的鄰居列表
+            for r, c in possibleNeighbors:
+                if self.isValidMove(r,c):
+                    neighbors.append((r,c)) ##append是把符合條件的鄰居加入列表
+            self.__states_explored += 1
+            return neighbors
+        if self.__adjacency is None:
+            self.__buildAdjacency()
+        # 查表就好，不用再一個一個檢查邊界跟牆壁
+        mask = self.__adjacency[row * self.cols + col]
+        neighbors = [(row + dr, col + dc) for dr, dc in self.__maskMoves[mask]]
         self.__states_explored += 1 ##每檢查一個鄰居就把探索狀態數量加一，作為前面說的評估演算法效率的指標
         #阿這個在part1很重要，因為要去看最後兩個演算法的效率
         return neighbors
 
+    # Builds the neighbor table now if it isn't there yet, without counting an
+    # explored state; getNeighbors/getNeighborIds otherwise build it on first use.
+    # Shallow copies of the maze made afterwards share it.
+    def buildNeighborTable(self):
+        if self.__adjacency is None:
+            self.__buildAdjacency()
+
+    # Returns the cell ids (row * cols + col) of the neighbors of the given cell id,
+    # counted as an explored state exactly like getNeighbors
+    def getNeighborIds(self, cell):
+        if self.__adjacency is None:
+            self.__buildAdjacency()
+        self.__states_explored += 1
+        return [cell + d for d in self.__maskOffsets[self.__adjacency[cell]]]
+
 ##兒兒真棒，已經看超過一半了，真厲害！
 
 
@@ -160,42 +503,31 @@ class Maze:
         #issubset是檢查目標列表的每個目標是否都在路徑中出現過，是python提供的集合操作方法
         #set(path)是把路徑轉換成集合，這樣可以去除重複的點
         #拿來判斷是否全部點點都吃掉了，沒passed代表還沒吃完
-        if not set(self.__objective).issubset(set(path)):
+        objectives = self.__objectiveSet
+        if not objectives.issubset(set(path)):
             return "Not all goals passed"
 
         # check whether it ends up at one of goals
         # path[-1]是路徑的最後一個位置，加not就是檢查最後一個位置是否在目標列表中
         # 翻成人話就是最後一個位置必須是目標位置之一才行
-        if not path[-1] in self.__objective:
+        if not path[-1] in objectives:
             return "Last position is not goal"
 
         # check for duplication
-        # set(path)是把路徑轉換成集合，這樣可以去除重複的點
-        # len(set(path)) != len(path)就是檢查路徑中是否有重複的點，如果有重複的點，就進行以下的檢查
-        if len(set(path)) != len(path):
-            c = Counter(path) #Counter是collections模組提供的工具，可以計算可迭代對象中每個元素出現的次數
-            #下面這句比較難理解喔兒兒
-            #dup_dots是找出所有在路徑中出現超過一次的點，不然就會變成同個位置被吃掉好幾次
-            #c就是計算每個點出現次數的字典，c.elements()是返回一個包含所有元素的迭代器，set()是把它轉換成集合以去除重複
-            #c[p] >= 2是檢查該點在路徑中出現的次數是否大於等於2，>=2的話代表被吃超過一次，打咩喔
-            #下面要加中括號是因為要建立一個列表，裡面包含所有出現超過一次的點
-            dup_dots = [p for p in set(c.elements()) if c[p] >= 2]
-            for p in dup_dots:
-                #indices是找出該重複點在路徑中所有出現的位置索引
-                #原本寫法是indices = [i for i, dot in enumerate(path) if dot == p]
-                #不過太難理解了，換個寫法，應該簡單很多
-                indices = []  # 建立空列表存放索引
-                for i in range(len(path)):  # 從0遍歷到路徑長度
-                    if path[i] == p:  # 如果這個位置等於重複點p
-                        indices.append(i)  # 把索引加入列表
-                #假設是重複的，除非發現中間有目標點，True代表是重複的，False代表不是重複的
-                #何時會變成False呢？就是在中間有目標點的時候
-                is_dup = True 
-                for i in range(len(indices) - 1):  # 逐對檢查同一點的相鄰兩次出現區間
-                    for dot in path[indices[i]+1: indices[i + 1]]: #檢查這兩次出現之間的路徑點
-                        if self.isObjective(dot[0], dot[1]): #若中間有目標點
-                            is_dup = False #false代表不是重複的
-                            break
-                if is_dup:
-                    return "Unnecessary path detected"
+        # A point visited more than once is only allowed if at least one stretch
+        # between two consecutive visits of it passes an objective.
+        # 只掃一遍：記住每個點上次出現的位置，跟最近一次經過目標點的位置，
+        # 最近的目標點在上次出現之後，就代表這段中間有吃到目標
+        last_seen = {} #點 -> 上次出現的index
+        duplicated = {} #重複的點 -> 有沒有哪一段中間有目標點
+        last_objective = -1 #最近一次經過目標點的index
+        for i, p in enumerate(path):
+            j = last_seen.get(p)
+            if j is not None:
+                duplicated[p] = duplicated.get(p, False) or last_objective > j
+            last_seen[p] = i
+            if p in objectives:
+                last_objective = i
+        if not all(duplicated.values()):
+            return "Unnecessary path detected"
         return "Valid"
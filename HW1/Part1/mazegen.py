@@ -0,0 +1,240 @@
+# mazegen.py
+# ---------------
+# Seeded generator for large mazes in the same text format as maps/, for
+# scaling and stress tests.
+
+"""
+Writes mazes of '%' walls, one 'P' start and '.' objectives, one row at a
+time, so only a couple of rows are ever in memory and 100M-cell maps can be
+written directly. The output loads with Maze / load_maze like the bundled maps.
+
+Styles (density is the chance that an optional wall is present):
+    perfect: a perfect maze (Eller's algorithm) on the odd cells. With
+        density < 1 each wall of the perfect maze between two cells is kept
+        only with that probability, which adds loops. Default 1.0.
+    rooms: a grid of room x room rooms, every pair of neighbouring rooms
+        joined by a one-cell door, with pillars scattered inside the rooms.
+        Default 0.1.
+    open: an open field where each inside cell is a wall with that
+        probability. Default 0.2.
+
+perfect and rooms mazes are always connected. An open field is not
+guaranteed to be, so objectives can be unreachable at high densities.
+
+The same arguments and seed always give the same maze.
+"""
+
+import argparse
+import random
+
+STYLES = ("perfect", "rooms", "open")
+DEFAULT_DENSITY = {"perfect": 1.0, "rooms": 0.1, "open": 0.2}
+
+
+def write_maze(filename, rows, cols, style="perfect", density=None, objectives=1, seed=None, room=8):
+    """
+    Writes a generated maze to filename.
+
+    @param filename: where to write the maze
+    @param rows, cols: size of the maze, borders included
+    @param style: "perfect", "rooms" or "open"
+    @param density: chance that an optional wall is present, None for the style default
+    @param objectives: number of '.' cells
+    @param seed: seed for the random generator
+    @param room: room size for the "rooms" style
+
+    @return filename
+    """
+    with open(filename, "w") as f:
+        for line in maze_rows(rows, cols, style, density, objectives, seed, room):
+            f.write(line)
+            f.write("\n")
+    return filename
+
+
+def maze_rows(rows, cols, style="perfect", density=None, objectives=1, seed=None, room=8):
+    """
+    Same as write_maze, but yields the rows as strings (without newlines).
+    """
+    if style not in STYLES:
+        raise ValueError("Unknown maze style %r, expected one of %s" % (style, ", ".join(STYLES)))
+    if rows < 3 or cols < 3:
+        raise ValueError("A maze needs at least 3 rows and 3 columns")
+    if style == "rooms" and room < 3:
+        raise ValueError("Rooms need a size of at least 3")
+    if density is None:
+        density = DEFAULT_DENSITY[style]
+    rng = random.Random(seed)
+
+    marks = _placeMarks(rng, rows, cols, style, objectives, room)
+    if style == "perfect":
+        lines = _perfectRows(rng, rows, cols, density)
+    elif style == "rooms":
+        lines = _roomRows(rng, rows, cols, density, room)
+    else:
+        lines = _openRows(rng, rows, cols, density)
+
+    for row, line in enumerate(lines):
+        if row in marks:
+            line = list(line)
+            for col, char in marks[row].items():
+                line[col] = char
+            line = "".join(line)
+        yield line
+
+
+# Picks the start and objective cells up front, among cells the style never
+# makes a wall, so rows can be streamed out afterwards: {row: {col: char}}
+def _placeMarks(rng, rows, cols, style, objectives, room):
+    if style == "perfect":
+        isCandidate = lambda r, c: r % 2 == 1 and c % 2 == 1 and r < rows - 1 - (rows % 2 == 0) and c < cols - 1 - (cols % 2 == 0)
+        capacity = ((rows - 1) // 2) * ((cols - 1) // 2)
+    elif style == "rooms":
+        isCandidate = lambda r, c: r % room % 2 == 1 and c % room % 2 == 1
+        capacity = sum(r % room % 2 for r in range(1, rows - 1)) * sum(c % room % 2 for c in range(1, cols - 1))
+    else:
+        isCandidate = lambda r, c: True
+        capacity = (rows - 2) * (cols - 2)
+    if objectives + 1 > capacity:
+        raise ValueError("Only room for %d objectives in a %dx%d %s maze" % (capacity - 1, rows, cols, style))
+
+    marks = {}
+    placed = 0
+    while placed < objectives + 1:
+        r, c = rng.randrange(1, rows - 1), rng.randrange(1, cols - 1)
+        if isCandidate(r, c) and c not in marks.get(r, ()):
+            marks.setdefault(r, {})[c] = "P" if placed == 0 else "."
+            placed += 1
+    return marks
+
+
+# Eller's algorithm: cells sit on odd rows/cols, one row of cells at a time.
+# sets[j] is the set of cell j in the current row; cells that don't carry a
+# passage down start the next row in a fresh set.
+def _perfectRows(rng, rows, cols, density):
+    cellRows, cellCols = (rows - 1) // 2, (cols - 1) // 2
+    padding = "%" * ((cols - 1) % 2) #even sizes get an extra wall column/row
+    wall = "%" * cols
+    loops = 1 - density
+
+    yield wall
+    sets = [-1] * cellCols
+    nextSet = 0
+    for i in range(cellRows):
+        last = i == cellRows - 1
+        for j in range(cellCols):
+            if sets[j] < 0:
+                sets[j] = nextSet
+                nextSet += 1
+
+        # Join neighbours in different sets at random (all of them on the last row)
+        parent = {}
+        def find(s):
+            while s in parent:
+                s = parent[s]
+            return s
+        coins = format(rng.getrandbits(cellCols), "0%db" % cellCols)
+        right = [False] * cellCols
+        for j in range(cellCols - 1):
+            a, b = find(sets[j]), find(sets[j + 1])
+            if a != b and (last or coins[j] == "1"):
+                parent[b] = a
+                right[j] = True
+            elif loops and rng.random() < loops:
+                right[j] = True
+        sets = [find(s) for s in sets]
+
+        # Every set carries at least one passage down
+        down = [False] * cellCols
+        if not last:
+            coins = format(rng.getrandbits(cellCols), "0%db" % cellCols)
+            carried = set()
+            for j in range(cellCols):
+                if coins[j] == "1":
+                    down[j] = True
+                    carried.add(sets[j])
+            stranded = {}
+            for j, s in enumerate(sets):
+                if s not in carried:
+                    stranded.setdefault(s, []).append(j)
+            for members in stranded.values():
+                down[rng.choice(members)] = True
+            if loops:
+                for j in range(cellCols):
+                    if not down[j] and rng.random() < loops:
+                        down[j] = True
+            sets = [s if d else -1 for s, d in zip(sets, down)]
+
+        yield "%" + "".join(" " + (" " if r else "%") for r in right)[:-1] + "%" + padding
+        if not last:
+            yield "%" + "".join((" " if d else "%") + "%" for d in down)[:-1] + "%" + padding
+    yield wall
+    if rows % 2 == 0:
+        yield wall
+
+
+# Walls on every room-th row and column, one door per wall between two rooms,
+# pillars only on even offsets inside a room so they never touch a wall or
+# each other and can't cut a room in two
+def _roomRows(rng, rows, cols, density, room):
+    wall = "%" * cols
+    pillarOffsets = range(2, room - 1, 2)
+    doorRows = {}
+
+    yield wall
+    for r in range(1, rows - 1):
+        offset = r % room
+        if offset == 0: #wall row with one door per room above/below it
+            line = ["%"] * cols
+            for c0 in range(1, cols - 1, room):
+                line[c0 + rng.randrange(min(room - 1, cols - 1 - c0))] = " "
+            yield "".join(line)
+            continue
+        if offset == 1: #a new band of rooms: pick the doors in its vertical walls
+            height = min(room - 1, rows - 1 - r)
+            doorRows = {c: r + rng.randrange(height) for c in range(room, cols - 1, room)}
+        line = [" "] * cols
+        line[0] = line[-1] = "%"
+        for c in range(room, cols - 1, room):
+            if doorRows[c] != r:
+                line[c] = "%"
+        if offset in pillarOffsets and density:
+            for c in range(1, cols - 1):
+                if c % room in pillarOffsets and rng.random() < density:
+                    line[c] = "%"
+        yield "".join(line)
+    yield wall
+
+
+def _openRows(rng, rows, cols, density):
+    wall = "%" * cols
+    random = rng.random
+    yield wall
+    for _ in range(rows - 2):
+        yield "%" + "".join("%" if random() < density else " " for _ in range(cols - 2)) + "%"
+    yield wall
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Generate HW1 mazes')
+
+    parser.add_argument('filename',
+                        help='where to write the maze [REQUIRED]')
+    parser.add_argument('--rows', dest="rows", type=int, default = 101,
+                        help='rows, borders included - default 101')
+    parser.add_argument('--cols', dest="cols", type=int, default = 101,
+                        help='columns, borders included - default 101')
+    parser.add_argument('--style', dest="style", type=str, default = "perfect", choices = STYLES,
+                        help='maze style - default perfect')
+    parser.add_argument('--density', dest="density", type=float, default = None,
+                        help='chance of each optional wall - default depends on the style')
+    parser.add_argument('--objectives', dest="objectives", type=int, default = 1,
+                        help='number of objectives - default 1')
+    parser.add_argument('--seed', dest="seed", type=int, default = 0,
+                        help='random seed - default 0')
+    parser.add_argument('--room', dest="room", type=int, default = 8,
+                        help='room size for --style rooms - default 8')
+
+    args = parser.parse_args()
+    write_maze(args.filename, args.rows, args.cols, args.style, args.density, args.objectives, args.seed, args.room)
@@ -0,0 +1,97 @@
+# render.py
+# ---------------
+# Headless rendering of a maze and a search result to a PNG file, without
+# pygame or a display. The picture matches what hw1.py draws on screen.
+
+"""
+This file contains render_png, which rasterizes the maze, the path, the start
+and the objectives straight into a palette PNG using only the standard library.
+"""
+
+import struct
+import zlib
+
+# Palette indices, the path colors come after these
+_WHITE, _BLACK, _BLUE = 0, 1, 2
+_FIXED_COLORS = [(255, 255, 255), (0, 0, 0), (0, 0, 255)]
+_PATH_COLORS = 256 - len(_FIXED_COLORS)
+
+# Same color scheme as Application.getColor in hw1.py
+def pathColor(pathLength, index, alt_color):
+    if alt_color:
+        start_color = (64, 224, 208)
+        end_color = (139, 0, 139)
+    else:
+        start_color = (255, 0, 0)
+        end_color = (0, 255, 0)
+    return tuple(int(s + index * (e - s) / pathLength) for s, e in zip(start_color, end_color))
+
+# Writes the maze with the given path drawn on it to filename as a PNG.
+# Each cell becomes a scale x scale block: walls and the path are laid down one
+# byte per cell and then widened with strided slice copies, so the cost is a few
+# C-level passes over the image instead of one draw call per cell.
+def render_png(maze, path, filename, scale=20, alt_color=False):
+    rows, cols = maze.getDimensions()
+    width, height = cols * scale, rows * scale
+
+    # one palette index per cell: walls black (the wall mask is already 1/0), everything else white
+    cells = bytearray(maze.getWallMask())
+
+    # the path gets a gradient, quantized to the palette entries left
+    palette = list(_FIXED_COLORS)
+    if path:
+        buckets = min(len(path), _PATH_COLORS)
+        for b in range(buckets):
+            palette.append(pathColor(len(path), b * len(path) // buckets, alt_color))
+        for index, (row, col) in enumerate(path):
+            if cells[row * cols + col] != _BLACK:
+                cells[row * cols + col] = len(_FIXED_COLORS) + index * buckets // len(path)
+
+    # widen every cell row to pixels, then repeat it scale times
+    pixels = bytearray(width * height)
+    for row in range(rows):
+        line = bytearray(width)
+        cellRow = cells[row * cols:(row + 1) * cols]
+        for k in range(scale):
+            line[k::scale] = cellRow
+        for k in range(scale):
+            y = row * scale + k
+            pixels[y * width:(y + 1) * width] = line
+
+    # the start is a blue square half the cell size, like drawStart
+    start = maze.getStart()
+    if start is not None:
+        left, top = int(start[1] * scale + scale / 4), int(start[0] * scale + scale / 4)
+        size = int(scale * 0.5)
+        for y in range(top, top + size):
+            pixels[y * width + left:y * width + left + size] = bytes([_BLUE]) * size
+
+    # objectives are black dots of radius scale / 4, like drawObjective
+    radius = int(scale / 4)
+    for row, col in maze.getObjectivesView():
+        cx, cy = int(col * scale + scale / 2), int(row * scale + scale / 2)
+        for dy in range(-radius, radius + 1):
+            half = int((radius * radius - dy * dy) ** 0.5)
+            y = cy + dy
+            if 0 <= y < height:
+                x0, x1 = max(cx - half, 0), min(cx + half + 1, width)
+                pixels[y * width + x0:y * width + x1] = bytes([_BLACK]) * (x1 - x0)
+
+    _writePNG(filename, width, height, palette, pixels)
+
+# Writes an 8-bit palette PNG (one byte per pixel, rows top to bottom)
+def _writePNG(filename, width, height, palette, pixels):
+    raw = bytearray()
+    for y in range(height):
+        raw.append(0) # filter type None
+        raw += pixels[y * width:(y + 1) * width]
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    with open(filename, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 3, 0, 0, 0)))
+        f.write(chunk(b'PLTE', b''.join(bytes(color) for color in palette)))
+        f.write(chunk(b'IDAT', zlib.compress(bytes(raw), 6)))
+        f.write(chunk(b'IEND', b''))
@@ -19,18 +19,156 @@ files and classes when code is run, so be careful to not modify anything else.
 # maze is a Maze object based on the maze from the file specified by input filename
 # searchMethod is the search method specified by --method flag (bfs,dfs,astar,astar_multi,fast)
 
-from collections import deque
+from array import array
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import heapq
+import sys
+import time
+import tracemalloc
+import weakref
+
+from maze import load_maze, packBits, unpackBits
 
 #search是一個總調度函數，根據searchMethod選擇對應的搜尋演算法
-def search(maze, searchMethod):
-    return {
-        "bfs": bfs,
-        "astar": astar,
-        "astar_corner": astar_corner,
-        "astar_multi": astar_multi,
-        "fast": fast,
-    }.get(searchMethod)(maze) #.get()會回傳對應的函數，並執行該函數，傳入maze參數，maze參數是一個迷宮物件
+#stats=True(或傳入一個SearchStats)時改為回傳(path, SearchStats)
+def search(maze, searchMethod, stats=False):
+    method = SEARCH_METHODS.get(searchMethod) #.get()會回傳對應的函數，SEARCH_METHODS定義在檔案最後
+    if stats:
+        if not isinstance(stats, SearchStats):
+            stats = SearchStats(searchMethod)
+        return _search_with_stats(maze, method, stats)
+    return method(maze) #執行該函數，傳入maze參數，maze參數是一個迷宮物件
+
+
+class SearchStats:
+    """
+    Counters for one search run, filled in when search() is called with
+    stats=True. Every search method fills in every field.
+
+    nodes_expanded: cells whose neighbors were generated (astar_multi: states
+        of the objective graph, jps: jump points, corridor: junctions, fast:
+        cells of the BFS runs behind its distance matrix and path segments,
+        none when the matrix comes from the cache)
+    nodes_generated: neighbors returned over all expansions
+    duplicates_skipped: the BFS searches - neighbors already seen; the A star searches - always 0,
+        their BucketQueue moves a cell on decrease-key instead of leaving a stale entry
+    peak_frontier: largest queue/heap size seen at an expansion (both queues
+        together for the bidirectional searches)
+    heuristic_time / neighbor_time: seconds spent in the heuristic and in getNeighbors
+    total_time: seconds for the whole call
+    peak_memory: peak bytes allocated during the call (tracemalloc), None with
+        track_memory=False; tracing makes the search several times slower
+    """
+
+    def __init__(self, method=None, track_memory=True):
+        self.method = method
+        self.track_memory = track_memory
+        self.nodes_expanded = 0
+        self.nodes_generated = 0
+        self.duplicates_skipped = 0
+        self.peak_frontier = 0
+        self.heuristic_time = 0.0
+        self.neighbor_time = 0.0
+        self.total_time = 0.0
+        self.peak_memory = 0
+        self.states_explored = 0
+        self.path_length = 0
+
+    def neighbors(self, getNeighbors, *frontiers):
+        """
+        Wraps maze.getNeighbors (or getNeighborIds, or any successor function)
+        so each call counts an expansion, the neighbors it returns and the time
+        it took, and samples the total size of the frontiers.
+        """
+        clock = time.perf_counter
+        def counted(*args):
+            self.nodes_expanded += 1
+            size = sum(map(len, frontiers)) + 1 #+1: the cell being expanded was just popped
+            if size > self.peak_frontier:
+                self.peak_frontier = size
+            t = clock()
+            result = getNeighbors(*args)
+            self.neighbor_time += clock() - t
+            self.nodes_generated += len(result)
+            return result
+        return counted
+
+    def heuristic(self, function):
+        """Wraps a heuristic so the time spent in it is added to heuristic_time."""
+        clock = time.perf_counter
+        def timed(a, b):
+            t = clock()
+            result = function(a, b)
+            self.heuristic_time += clock() - t
+            return result
+        return timed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def _search_with_stats(maze, method, stats):
+    tracing = tracemalloc.is_tracing()
+    if stats.track_memory:
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    t = time.perf_counter()
+    try:
+        path = method(maze, stats=stats)
+    finally:
+        stats.total_time = time.perf_counter() - t
+        if stats.track_memory:
+            stats.peak_memory = tracemalloc.get_traced_memory()[1] - baseline
+            if not tracing:
+                tracemalloc.stop()
+        else:
+            stats.peak_memory = None
+    stats.states_explored = maze.getStatesExplored()
+    stats.path_length = len(path)
+    return path, stats
+
+
+# One finished job of search_many
+SearchResult = namedtuple("SearchResult", ["filename", "method", "path_length", "states_explored", "time", "validation"])
+
+
+def search_many(jobs, workers=None):
+    """
+    Runs many (filename, searchMethod) jobs across a pool of worker processes.
+
+    Each worker loads its own maze from the file, so no grids are pickled, and
+    results are yielded as soon as they finish (not in job order). A job that
+    fails gives a result with the error in validation instead of stopping the rest.
+
+    @param jobs: an iterable of (filename, searchMethod) pairs
+    @param workers: number of worker processes - default one per CPU
+
+    @return: a generator of SearchResult tuples
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_job, filename, searchMethod) for filename, searchMethod in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+#錯誤都變成一筆結果(寫在validation裡)，不然一個壞掉的job會讓search_many後面的結果全部丟掉
+def _run_job(filename, searchMethod): #在worker process裡面跑一個job
+    try:
+        maze = load_maze(filename)
+    except SystemExit: #地圖格式錯誤，Maze已經印過訊息了
+        return SearchResult(filename, searchMethod, 0, 0, 0.0, "Maze could not be loaded")
+    except Exception as e: #檔案不存在、.mzc壞掉之類的
+        return SearchResult(filename, searchMethod, 0, 0, 0.0, "Maze could not be loaded: %r" % (e,))
+    t1 = time.perf_counter()
+    try:
+        path = search(maze, searchMethod)
+    except Exception as e:
+        return SearchResult(filename, searchMethod, 0, maze.getStatesExplored(), time.perf_counter() - t1, "Search failed: %r" % (e,))
+    total_time = time.perf_counter() - t1
+    return SearchResult(filename, searchMethod, len(path), maze.getStatesExplored(), total_time, maze.isValidPath(path))
 
 
 def manhattan_distance(pos1, pos2): #回傳兩個位置的曼哈頓距離，作為A*的啟發式函數
@@ -53,9 +191,88 @@ def reconstruct_path(parent, start, goal):
 #欸不是阿大哥，AI直接幫我打好我想要打的總結，是有點太牛逼，真棒
 
 
+class BucketQueue:
+    """
+    Priority queue of cell ids (row * cols + col) for small non-negative
+    integer priorities, such as A star's f = g + Manhattan distance.
+
+    buckets[p] holds the cells queued with priority p, as a dict used as an
+    ordered set, and key maps every queued cell to its priority. Pushing a
+    cell that is already queued moves it to its new bucket, so decrease-key
+    leaves no stale entry behind, and a push allocates no heap entry. pop
+    takes from the lowest non-empty bucket, latest pushed first (dict.popitem
+    is LIFO): under A star with unit steps that is the deepest cell (largest
+    g) of the f layer, which heads for the goal instead of widening the layer.
+    Emptied buckets below the lowest priority are dropped, so memory follows
+    the frontier, not the grid.
+    """
+
+    def __init__(self):
+        self.key = {}
+        self.buckets = []
+        self.low = 0 #no bucket below this one holds anything; after pop, the popped cell's priority
+
+    def __len__(self):
+        return len(self.key)
+
+    def __contains__(self, cell):
+        return cell in self.key
+
+    def push(self, cell, priority):
+        """Queues cell with priority, moving it if it is already queued."""
+        key, buckets = self.key, self.buckets
+        old = key.get(cell)
+        if old is not None:
+            del buckets[old][cell]
+        if priority >= len(buckets):
+            buckets.extend([None] * (priority + 1 - len(buckets)))
+        bucket = buckets[priority]
+        if bucket is None:
+            bucket = buckets[priority] = {}
+        bucket[cell] = None
+        key[cell] = priority
+        if priority < self.low:
+            self.low = priority
+
+    def min_priority(self):
+        """Returns the smallest priority in the queue, which must not be empty."""
+        if not self.key:
+            raise IndexError("min_priority of an empty BucketQueue")
+        buckets, low = self.buckets, self.low
+        while not buckets[low]:
+            buckets[low] = None
+            low += 1
+        self.low = low
+        return low
+
+    def pop(self):
+        """
+        Removes and returns the cell with the smallest priority (the latest
+        pushed on ties). Its priority is left in low.
+        """
+        cell = self.buckets[self.min_priority()].popitem()[0]
+        del self.key[cell]
+        return cell
+
+    def clear(self):
+        self.key.clear()
+        self.buckets = []
+        self.low = 0
+
+
+def _cell_path(parent, source, target, cols):
+    """Follows parent (cell id -> cell id, an array or a dict) back from target to source, as (row, col)."""
+    path = [divmod(target, cols)]
+    while target != source:
+        target = parent[target]
+        path.append(divmod(target, cols))
+    path.reverse()
+    return path
+
+
 #恭喜你看了56行了，繼續加油，喔對，記得餵狗！
 
-def bfs(maze): #廣度優先搜尋 (Breadth-First Search)
+def bfs(maze, stats=None): #廣度優先搜尋 (Breadth-First Search)
     """
     Runs BFS for part 1 of the assignment.
     
@@ -63,6 +280,7 @@ def bfs(maze): #廣度優先搜尋 (Breadth-First Search)
     Goal test: reached a dot position
     
     @param maze: The maze to execute the search on.
+    @param stats: optional SearchStats to fill in
 
     @return path: a list of tuples containing the coordinates of each state in the computed path
     """
@@ -84,6 +302,7 @@ def bfs(maze): #廣度優先搜尋 (Breadth-First Search)
     queue = deque([start]) #deque是雙端佇列，可以高效地從兩端添加和刪除元素，初始化時將起點加入隊列
     visited = {start} #使用集合來記錄已訪問的節點，初始化時將起點加入已訪問集合
     parent = {start: None} #使用字典來記錄每個節點的父節點，初始化時將起點的父節點設為None
+    getNeighbors = maze.getNeighbors if stats is None else stats.neighbors(maze.getNeighbors, queue) #有stats時才換成計數版本，迴圈內不用多做判斷
     #從第58行道地87行這邊都是在做初始化，下面才會開始真正的BFS搜尋
     ##############################################################################
     #############          在下面開始實作BFS演算法          ##################
@@ -93,11 +312,13 @@ def bfs(maze): #廣度優先搜尋 (Breadth-First Search)
         current = queue.popleft() #從隊列的左端取出當前節點，popleft()是deque的方法，可以高效地從左端刪除並回傳元素
         
         if current == goal: #如果當前節點是目標點，表示找到了路徑
+            if stats is not None:
+                stats.duplicates_skipped = stats.nodes_generated - (len(visited) - 1) #除了起點，每個visited的節點都只被加入一次
             return reconstruct_path(parent, start, goal) #reconstruct_path()會回傳從起點到目標點的完整路徑，定義在46行到55行
         
         # Explore neighbors in the exact order returned by getNeighbors()
         #getNeighbors()定義在maze.py中的第100行，是我們自己定義的函式
-        neighbors = maze.getNeighbors(current[0], current[1]) #回傳當前節點的鄰居列表，形式是list of (row, col)的tuple
+        neighbors = getNeighbors(current[0], current[1]) #回傳當前節點的鄰居列表，形式是list of (row, col)的tuple
         for neighbor in neighbors: #neighbors是鄰居列表，對每個鄰居進行迭代；neighbor是當前鄰居的(row, col)tuple
             if neighbor not in visited: #visited是已訪問集合，檢查當前鄰居是否已被訪問過，沒有的話就進行以下操作
                 visited.add(neighbor) #把這個鄰居加入已訪問集合，表示已經訪問過了
@@ -105,16 +326,20 @@ def bfs(maze): #廣度優先搜尋 (Breadth-First Search)
                 queue.append(neighbor) #把這個鄰居加入隊列，等待後續探索，append()是deque的方法，可以高效地從右端添加元素
     
     # No path found
+    if stats is not None:
+        stats.duplicates_skipped = stats.nodes_generated - (len(visited) - 1)
     return [] #如果隊列空了還沒找到目標點，表示沒有路徑可達，回傳空列表
 
 
-def astar(maze):
+def astar(maze, stats=None, cache=None):
     """
     Runs A star for part 1 of the assignment.
     
-    Uses Manhattan distance as heuristic.
+    Uses Manhattan distance as heuristic, or the goal's heuristic from cache.
     
     @param maze: The maze to execute the search on.
+    @param stats: optional SearchStats to fill in
+    @param cache: optional HeuristicCache of the maze (see heuristic_cache)
 
     @return path: a list of tuples containing the coordinates of each state in the computed path
     """
@@ -129,98 +354,1727 @@ def astar(maze):
     goal = objectives[0] #取得唯一的目標點位置
     
     # A* search
-    # Priority queue: (f_value, counter, position)
-    counter = 0  #作為計數器，避免heapq在f_value相同時無法比較位置而報錯
-     #heapq是python標準庫中的一個模組，提供了堆積資料結構的實現，可以用來實現優先佇列
-     #可參考官方文件：https://docs.python.org/zh-tw/3/search.html?q=heap
      #f_value是評估函數值，等於g_value（從起點到當前節點的實際成本）加上h_value（從當前節點到目標節點的估計成本）
      #f(x) = g(x) + h(x)
      #在這裡g_value是每移動一步的成本為1，所以g_value等於從起點到當前節點的步數
      #h_value是使用曼哈頓距離作為啟發式函數，計算當前節點到目標節點的距離
-    heap = [(0, counter, start)] #初始化優先佇列，將起點加入佇列，f_value為0，counter為0
-     #heap是一個列表，裡面每個元素都是一個tuple，包含(f_value, counter, position)
-     #position是當前節點的位置，形式是(row, col)的tuple
-     #counter是用來避免f_value相同時無法比較位置而報錯
-     #所以每次加入新的節點到heap時，counter都要加1，以確保每個節點的counter值都是唯一的
-     #這樣heapq在比較f_value相同的節點時，可以用counter來決定順序，避免報錯
-     #heapq會根據tuple的第一個元素進行排序，如果第一個元素相同，則比較第二個元素，以此類推
-     #所以counter的作用就是在f_value相同時，提供一個次要的排序依據
-     #這樣就能確保heapq在處理f_value相同的節點時，不會因為無法比較位置而報錯
-    counter += 1 #增加計數器
-    
-    visited = set() #使用集合來記錄已訪問的節點
-     #set是一種無序且不重複的資料結構，適合用來快速檢查元素是否存在
+     #f都是不大的整數，所以優先佇列用BucketQueue：每個f值一個桶，格子用編號 row * cols + col 存
+     #同一格有更好的g時直接搬桶(decrease-key)，佇列裡不會有過期的舊項目，也不用counter來比大小
+     #g不用另外存：pop出來的格子 g = f - h
+    rows, cols = maze.getDimensions()
+    source = start[0] * cols + start[1]
+    target = goal[0] * cols + goal[1]
+    getNeighbors = maze.getNeighbors
+    heuristic = manhattan_distance if cache is None else cache.heuristic(goal) #有cache時換成精確距離或ALT下界
+    if cache is not None and cache.unreachable(start, goal): #距離場已經看得出兩邊不相連，不用搜了
+        return []
+    frontier = BucketQueue() #初始化優先佇列，將起點加入佇列
+    if stats is not None: #有stats時才換成計數、計時的版本，迴圈內不用多做判斷
+        getNeighbors, heuristic = stats.neighbors(getNeighbors, frontier), stats.heuristic(heuristic)
+    frontier.push(source, heuristic(start, goal))
+    queued = frontier.key #還在佇列裡的格子 -> f
 
     ##############################################################################
     #############          在下面開始實作A*演算法          ##################
     ##############################################################################
-    g_cost = {start: 0}  #紀錄從起點到每個節點的實際成本，初始化起點的g_cost為0
-    #g_cost是一個字典，鍵是節點位置，值是從起點到該節點的實際成本
-    #start: 0是指起點的g_cost為0，因為從起點到起點的成本為0
-    #在這裡每移動一步的成本為1，所以g_cost等於從起點到該節點的步數
-    parent = {start: None} #使用字典來記錄每個節點的父節點，初始化時將起點的父節點設為None
+    parent = {source: None} #使用字典來記錄每個節點的父節點編號；在parent裡但不在佇列裡的就是已經展開過的
     
-    while heap: #當heap 不為空時，表示還有節點要探索，繼續執行A*搜尋
-        f_value, _, current = heapq.heappop(heap) 
-        
-        if current in visited:
-            continue
-        
-        visited.add(current)
+    while frontier: #當frontier不為空時，表示還有節點要探索，繼續執行A*搜尋
+        current = frontier.pop() #f最小的節點，一樣小的話拿最後放進去的（g最深的）
+        position = divmod(current, cols)
         
-        if current == goal:
-            return reconstruct_path(parent, start, goal)
+        if current == target:
+            return _cell_path(parent, source, target, cols)
         
         # Explore neighbors
-        neighbors = maze.getNeighbors(current[0], current[1])
-        for neighbor in neighbors:
-            if neighbor in visited:
+        new_g_cost = frontier.low - heuristic(position, goal) + 1
+        for neighbor in getNeighbors(*position):
+            cell = neighbor[0] * cols + neighbor[1]
+            if cell in parent and cell not in queued: #已經展開過了
                 continue
-            
-            new_g_cost = g_cost[current] + 1
-            
-            if neighbor not in g_cost or new_g_cost < g_cost[neighbor]:
-                g_cost[neighbor] = new_g_cost
-                h_cost = manhattan_distance(neighbor, goal)
-                f_cost = new_g_cost + h_cost
-                parent[neighbor] = current
-                heapq.heappush(heap, (f_cost, counter, neighbor))
-                counter += 1
+            f_cost = new_g_cost + heuristic(neighbor, goal)
+            if f_cost < queued.get(cell, f_cost + 1):
+                parent[cell] = current
+                frontier.push(cell, f_cost)
     
     # No path found
     return []
 
-def astar_corner(maze):
+# One batch of a generator search: cells expanded and cells added to the frontier
+# since the previous step, and the path once the search is over (None until then)
+SearchStep = namedtuple("SearchStep", ["expanded", "frontier", "path"])
+
+
+def search_steps(maze, searchMethod, batch_size=64):
+    """
+    Generator counterpart of search(), for the methods that have one (bfs, astar).
+
+    @param maze: The maze to execute the search on.
+    @param searchMethod: "bfs" or "astar"
+    @param batch_size: number of expansions per yielded step
+
+    @return: a generator of SearchStep, the last one carrying the path
+    """
+    return {
+        "bfs": bfs_steps,
+        "astar": astar_steps,
+    }[searchMethod](maze, batch_size)
+
+
+def bfs_steps(maze, batch_size=64):
+    """
+    Runs the same BFS as bfs, yielding the expanded and frontier cells every
+    batch_size expansions, so it can be watched live. bfs itself is left
+    untouched, so it pays nothing for this.
+
+    @param maze: The maze to execute the search on.
+    @param batch_size: number of expansions per yielded step
+
+    @return: a generator of SearchStep, the last one carrying the path
+    """
+    start = maze.getStart()
+    objectives = maze.getObjectives()
+    if not objectives:
+        yield SearchStep([], [], [start])
+        return
+    goal = objectives[0]
+
+    queue = deque([start])
+    visited = {start}
+    parent = {start: None}
+    expanded, frontier = [], [start]
+    path = []
+    while queue:
+        current = queue.popleft()
+        expanded.append(current)
+        if current == goal:
+            path = reconstruct_path(parent, start, goal)
+            break
+        for neighbor in maze.getNeighbors(current[0], current[1]):
+            if neighbor not in visited:
+                visited.add(neighbor)
+                parent[neighbor] = current
+                queue.append(neighbor)
+                frontier.append(neighbor)
+        if len(expanded) >= batch_size:
+            yield SearchStep(expanded, frontier, None)
+            expanded, frontier = [], []
+    yield SearchStep(expanded, frontier, path)
+
+
+def astar_steps(maze, batch_size=64):
+    """
+    Runs the same A star as astar, yielding the expanded and frontier cells every
+    batch_size expansions (see bfs_steps).
+
+    @param maze: The maze to execute the search on.
+    @param batch_size: number of expansions per yielded step
+
+    @return: a generator of SearchStep, the last one carrying the path
+    """
+    start = maze.getStart()
+    objectives = maze.getObjectives()
+    if not objectives:
+        yield SearchStep([], [], [start])
+        return
+    goal = objectives[0]
+
+    rows, cols = maze.getDimensions()
+    source = start[0] * cols + start[1]
+    target = goal[0] * cols + goal[1]
+    queue = BucketQueue()
+    queue.push(source, manhattan_distance(start, goal))
+    queued = queue.key
+    parent = {source: None}
+    expanded, frontier = [], [start]
+    path = []
+    while queue:
+        current = queue.pop()
+        position = divmod(current, cols)
+        expanded.append(position)
+        if current == target:
+            path = _cell_path(parent, source, target, cols)
+            break
+        new_g_cost = queue.low - manhattan_distance(position, goal) + 1
+        for neighbor in maze.getNeighbors(*position):
+            cell = neighbor[0] * cols + neighbor[1]
+            if cell in parent and cell not in queued:
+                continue
+            f_cost = new_g_cost + manhattan_distance(neighbor, goal)
+            if f_cost < queued.get(cell, f_cost + 1):
+                parent[cell] = current
+                queue.push(cell, f_cost)
+                frontier.append(neighbor)
+        if len(expanded) >= batch_size:
+            yield SearchStep(expanded, frontier, None)
+            expanded, frontier = [], []
+    yield SearchStep(expanded, frontier, path)
+
+
+def bidirectional_bfs(maze, stats=None):
+    """
+    Runs BFS from the start and from the objective at the same time.
+
+    Each round expands one whole layer of the smaller frontier. The first cell
+    generated by one side that the other side has already reached is where the
+    two meet, and the path is spliced from both parent maps.
+
+    @param maze: The maze to execute the search on.
+    @param stats: optional SearchStats to fill in
+
+    @return path: a list of tuples containing the coordinates of each state in the computed path
+    """
+    start = maze.getStart()
+    objectives = maze.getObjectives()
+    if not objectives:
+        return [start]
+    goal = objectives[0]
+    if start == goal:
+        return [start]
+
+    parent_f = {start: None} #從起點長出來的
+    parent_b = {goal: None} #從終點長回去的
+    queue_f = deque([start])
+    queue_b = deque([goal])
+    getNeighbors = maze.getNeighbors if stats is None else stats.neighbors(maze.getNeighbors, queue_f, queue_b)
+
+    while queue_f and queue_b:
+        if len(queue_f) <= len(queue_b):
+            queue, parent, other = queue_f, parent_f, parent_b
+        else:
+            queue, parent, other = queue_b, parent_b, parent_f
+        for _ in range(len(queue)): #一次做完一整層
+            current = queue.popleft()
+            neighbors = getNeighbors(current[0], current[1])
+            for neighbor in neighbors:
+                if neighbor not in parent:
+                    parent[neighbor] = current
+                    if neighbor in other: #兩邊碰到了
+                        if stats is not None: #這一格後面的鄰居沒看過，不算重複
+                            stats.duplicates_skipped = stats.nodes_generated - (len(neighbors) - neighbors.index(neighbor) - 1) \
+                                - (len(parent_f) + len(parent_b) - 2)
+                        return _join_paths(parent_f, parent_b, start, goal, neighbor)
+                    queue.append(neighbor)
+
+    # No path found
+    if stats is not None:
+        stats.duplicates_skipped = stats.nodes_generated - (len(parent_f) + len(parent_b) - 2)
+    return []
+
+
+def bidirectional_astar(maze, stats=None):
+    """
+    Runs A star from the start and from the objective at the same time.
+
+    The forward search aims at the objective and the backward one at the start,
+    both with Manhattan distance. mu is the cost of the best path through a cell
+    reached from both sides; the search stops once mu is no larger than the
+    smallest f of either open list, since every path not seen yet costs at least that.
+
+    @param maze: The maze to execute the search on.
+    @param stats: optional SearchStats to fill in
+
+    @return path: a list of tuples containing the coordinates of each state in the computed path
+    """
+    start = maze.getStart()
+    objectives = maze.getObjectives()
+    if not objectives:
+        return [start]
+    goal = objectives[0]
+
+    cols = maze.getDimensions()[1]
+    source = start[0] * cols + start[1]
+    target = goal[0] * cols + goal[1]
+    queue_f, queue_b = BucketQueue(), BucketQueue()
+    getNeighbors, heuristic = maze.getNeighbors, manhattan_distance
+    if stats is not None:
+        getNeighbors, heuristic = stats.neighbors(getNeighbors, queue_f, queue_b), stats.heuristic(heuristic)
+    queue_f.push(source, heuristic(start, goal))
+    queue_b.push(target, heuristic(goal, start))
+    g_f, g_b = {source: 0}, {target: 0} #有g但不在佇列裡的就是已經展開過的
+    parent_f, parent_b = {source: None}, {target: None}
+    mu, meet = float("inf"), None
+    if start == goal:
+        mu, meet = 0, source
+
+    while queue_f and queue_b:
+        if meet is not None and mu <= max(queue_f.min_priority(), queue_b.min_priority()):
+            break
+        if len(queue_f) <= len(queue_b):
+            queue, g_cost, parent, aim, other_g = queue_f, g_f, parent_f, goal, g_b
+        else:
+            queue, g_cost, parent, aim, other_g = queue_b, g_b, parent_b, start, g_f
+
+        current = queue.pop()
+        queued = queue.key
+        new_g_cost = g_cost[current] + 1
+        for neighbor in getNeighbors(*divmod(current, cols)):
+            cell = neighbor[0] * cols + neighbor[1]
+            old = g_cost.get(cell)
+            if old is not None and (cell not in queued or new_g_cost >= old):
+                continue
+            g_cost[cell] = new_g_cost
+            parent[cell] = current
+            queue.push(cell, new_g_cost + heuristic(neighbor, aim))
+            if cell in other_g and new_g_cost + other_g[cell] < mu: #另一邊也走到過這格
+                mu = new_g_cost + other_g[cell]
+                meet = cell
+
+    if meet is None:
+        # No path found
+        return []
+    return _cell_path(parent_f, source, meet, cols) + _cell_path(parent_b, target, meet, cols)[-2::-1]
+
+
+def _join_paths(parent_f, parent_b, start, goal, meet):
+    """Splices the start->meet path of parent_f with the meet->goal path of parent_b."""
+    forward = reconstruct_path(parent_f, start, meet)
+    backward = reconstruct_path(parent_b, goal, meet) #goal -> meet
+    backward.reverse()
+    return forward + backward[1:]
+
+
+def jps(maze, precompute=False, stats=None):
+    """
+    Runs Jump Point Search, A star on a 4-connected uniform-cost grid that only
+    stops at jump points instead of every cell.
+
+    Moving horizontally, a jump stops where a wall beside the path ends (a forced
+    neighbor) or at the objective; moving vertically, it also stops wherever a
+    horizontal jump from the cell would stop. Each expanded jump point asks
+    maze.getNeighbors for its free moves, so getStatesExplored counts expansions.
+    The path between consecutive jump points is filled in cell by cell.
+
+    @param maze: The maze to execute the search on.
+    @param precompute: use the JPS+ jump table of the maze (built once, see JumpTable)
+    @param stats: optional SearchStats to fill in
+
+    @return path: a list of tuples containing the coordinates of each state in the computed path
+    """
+    start = maze.getStart()
+    objectives = maze.getObjectives()
+    if not objectives:
+        return [start]
+    goal = objectives[0]
+
+    jump = jump_table(maze).jump if precompute else _make_jump(maze)
+
+    cols = maze.getDimensions()[1]
+    source = start[0] * cols + start[1]
+    target = goal[0] * cols + goal[1]
+    queue = BucketQueue()
+    getNeighbors, heuristic = maze.getNeighbors, manhattan_distance
+    if stats is not None:
+        getNeighbors, heuristic = stats.neighbors(getNeighbors, queue), stats.heuristic(heuristic)
+    queue.push(source, heuristic(start, goal))
+    queued = queue.key
+    parent = {source: None} #在parent裡但不在佇列裡的就是已經展開過的
+
+    while queue:
+        current = queue.pop()
+
+        if current == target:
+            return _fill_jumps(_cell_path(parent, source, target, cols))
+
+        row, col = divmod(current, cols)
+        g_cost = queue.low - heuristic((row, col), goal)
+        before = divmod(parent[current], cols) if current != source else None
+        for neighbor in getNeighbors(row, col):
+            dr, dc = neighbor[0] - row, neighbor[1] - col
+            if before is not None and _is_pruned(before, (row, col), dr, dc):
+                continue
+            point = jump(row, col, dr, dc, goal)
+            if point is None:
+                continue
+            cell = point[0] * cols + point[1]
+            if cell in parent and cell not in queued:
+                continue
+            f_cost = g_cost + abs(point[0] - row) + abs(point[1] - col) + heuristic(point, goal)
+            if f_cost < queued.get(cell, f_cost + 1):
+                parent[cell] = current
+                queue.push(cell, f_cost)
+
+    # No path found
+    return []
+
+
+def jps_plus(maze, stats=None):
+    """
+    Runs Jump Point Search with the precomputed JPS+ jump table of the maze.
+
+    @param maze: The maze to execute the search on.
+    @param stats: optional SearchStats to fill in
+
+    @return path: a list of tuples containing the coordinates of each state in the computed path
+    """
+    return jps(maze, precompute=True, stats=stats)
+
+
+def _is_pruned(before, current, dr, dc):
+    """
+    True if moving (dr, dc) from current isn't needed given we came from before.
+
+    Arriving horizontally only the two vertical moves and straight ahead are kept,
+    arriving vertically only the two horizontal moves and straight ahead.
+    """
+    pr = current[0] - before[0]
+    pc = current[1] - before[1]
+    if pc != 0: #橫著走過來的
+        return dc != 0 and (dc > 0) != (pc > 0)
+    return dr != 0 and (dr > 0) != (pr > 0)
+
+
+def _make_jump(maze):
+    """Returns jump(row, col, dr, dc, goal) that scans the grid (plain JPS)."""
+    walkable = maze.isValidMove
+
+    def jump(row, col, dr, dc, goal):
+        while True:
+            row += dr
+            col += dc
+            if not walkable(row, col):
+                return None
+            if (row, col) == goal:
+                return (row, col)
+            if dc != 0:
+                # forced neighbor: the wall above/below the way we came in ends here
+                if (walkable(row - 1, col) and not walkable(row - 1, col - dc)) or \
+                   (walkable(row + 1, col) and not walkable(row + 1, col - dc)):
+                    return (row, col)
+            else:
+                if (walkable(row, col - 1) and not walkable(row - dr, col - 1)) or \
+                   (walkable(row, col + 1) and not walkable(row - dr, col + 1)):
+                    return (row, col)
+                if jump(row, col, 0, 1, goal) is not None or jump(row, col, 0, -1, goal) is not None:
+                    return (row, col)
+
+    return jump
+
+
+def _fill_jumps(points):
+    """Expands a list of collinear jump points into the full cell-by-cell path."""
+    path = points[:1]
+    for (r0, c0), (r1, c1) in zip(points, points[1:]):
+        dr = (r1 > r0) - (r1 < r0)
+        dc = (c1 > c0) - (c1 < c0)
+        for step in range(1, abs(r1 - r0) + abs(c1 - c0) + 1):
+            path.append((r0 + dr * step, c0 + dc * step))
+    return path
+
+
+class JumpTable:
+    """
+    JPS+ jump distances of a maze, goal independent.
+
+    For every cell and each direction (down, up, right, left -- the getNeighbors
+    order) the table holds d > 0 if the next jump point is d steps away, or -w
+    (w >= 0) if there is none and the last free cell before a wall is w steps away.
+    The objective is checked against these spans at query time.
+    """
+
+    def __init__(self, maze):
+        rows, cols = maze.getDimensions()
+        self.rows, self.cols = rows, cols
+        walkable = maze.isValidMove
+        n = rows * cols
+        down, up, right, left = (array('i', [0]) * n for _ in range(4))
+
+        for row in range(rows):
+            # going right, the cell to the right decides; sweep right to left
+            for col in range(cols - 2, -1, -1):
+                nxt = col + 1
+                if not walkable(row, nxt):
+                    continue
+                if (walkable(row - 1, nxt) and not walkable(row - 1, col)) or \
+                   (walkable(row + 1, nxt) and not walkable(row + 1, col)):
+                    right[row * cols + col] = 1
+                else:
+                    d = right[row * cols + nxt]
+                    right[row * cols + col] = d + 1 if d > 0 else d - 1
+            for col in range(1, cols):
+                nxt = col - 1
+                if not walkable(row, nxt):
+                    continue
+                if (walkable(row - 1, nxt) and not walkable(row - 1, col)) or \
+                   (walkable(row + 1, nxt) and not walkable(row + 1, col)):
+                    left[row * cols + col] = 1
+                else:
+                    d = left[row * cols + nxt]
+                    left[row * cols + col] = d + 1 if d > 0 else d - 1
+
+        # vertical jumps also stop where a horizontal jump would find a jump point
+        for col in range(cols):
+            for table, dr, rng in ((down, 1, range(rows - 2, -1, -1)), (up, -1, range(1, rows))):
+                for row in rng:
+                    nxt = row + dr
+                    if not walkable(nxt, col):
+                        continue
+                    cell = nxt * cols + col
+                    if (walkable(nxt, col - 1) and not walkable(row, col - 1)) or \
+                       (walkable(nxt, col + 1) and not walkable(row, col + 1)) or \
+                       right[cell] > 0 or left[cell] > 0:
+                        table[row * cols + col] = 1
+                    else:
+                        d = table[cell]
+                        table[row * cols + col] = d + 1 if d > 0 else d - 1
+
+        self.tables = {(1, 0): down, (-1, 0): up, (0, 1): right, (0, -1): left}
+
+    def jump(self, row, col, dr, dc, goal):
+        """Same contract as the scanning jump of plain JPS, answered from the table."""
+        cols = self.cols
+        d = self.tables[(dr, dc)][row * cols + col]
+        reach = d if d > 0 else -d
+        goal_row, goal_col = goal
+        if dr == 0:
+            steps = (goal_col - col) * dc
+            if goal_row == row and 0 < steps <= reach:
+                return goal
+        else:
+            # the objective stops a vertical jump on its row if a horizontal jump from there reaches it
+            steps = (goal_row - row) * dr
+            if 0 < steps <= reach:
+                side = goal_col - col
+                if side == 0:
+                    return goal
+                table = self.tables[(0, 1 if side > 0 else -1)]
+                h = table[goal_row * cols + col]
+                if abs(side) <= (h if h > 0 else -h):
+                    return (goal_row, col)
+        if d > 0:
+            return (row + dr * d, col + dc * d)
+        return None
+
+
+# JumpTable per maze, rebuilt if the grid changes
+_jump_tables = weakref.WeakKeyDictionary()
+
+
+def jump_table(maze):
+    """Returns the JumpTable of the maze, building it the first time it is asked for."""
+    entry = _jump_tables.get(maze)
+    if entry is None or entry[0] != maze.getGridKey():
+        entry = (maze.getGridKey(), JumpTable(maze))
+        _jump_tables[maze] = entry
+    return entry[1]
+
+
+class CorridorGraph:
+    """
+    The maze shrunk to its junctions, for mazes that are mostly corridors. It
+    only depends on the walls, so one graph serves every start and objective.
+
+    Dead ends are pruned first: an open cell with at most one open neighbor
+    can't be on a path between two other cells, so it is dropped, and so is
+    every cell that becomes a dead end after it, back to the junction. The
+    pruned cells form trees, each hanging off one cell of what's left (or
+    standing alone, when nothing is left in that part of the maze); toward[cell]
+    is the step from a pruned cell up its tree, 0 at the top of a lone tree.
+    What's left is cut at its nodes (cells that don't have exactly 2 neighbors
+    left, plus one cell on every loop that has none) and every corridor between
+    two nodes becomes one weighted edge.
+
+    is_node[cell] is 1 for the nodes. Neighboring nodes are joined by an
+    implicit edge of length 1; longer corridors are kept in corridors, keyed
+    by the corridor cell next to each end, as (one end, other end, length).
+    So a search can go through maze.getNeighborIds as usual and look each
+    neighbor up, and pruned cells just aren't found. Only corridor ends are
+    stored, which keeps open grids (nearly all nodes) cheap, and expand walks
+    the corridor cells again for the final path. The graph is built from the
+    wall mask, without touching getStatesExplored.
+    """
+
+    def __init__(self, maze):
+        rows, cols = maze.getDimensions()
+        self.cols = cols
+        n = rows * cols
+        walls = maze.getWallMask()
+
+        def around(cell):
+            row, col = divmod(cell, cols)
+            cells = []
+            if row + 1 < rows and not walls[cell + cols]:
+                cells.append(cell + cols)
+            if row > 0 and not walls[cell - cols]:
+                cells.append(cell - cols)
+            if col + 1 < cols and not walls[cell + 1]:
+                cells.append(cell + 1)
+            if col > 0 and not walls[cell - 1]:
+                cells.append(cell - 1)
+            return cells
+
+        alive = bytearray(1 - wall for wall in walls)
+        degree = bytearray(len(around(cell)) if alive[cell] else 0 for cell in range(n))
+        toward = bytearray(n)
+        code = {cols: 1, -cols: 2, 1: 3, -1: 4} #toward的編號 -> 格子編號的位移，見self.steps
+
+        # 從死路的盡頭一路往回剪，剪到岔路為止；剪掉的格子記下往回走的方向
+        stack = [cell for cell in range(n) if alive[cell] and degree[cell] <= 1]
+        while stack:
+            cell = stack.pop()
+            alive[cell] = 0
+            for neighbor in around(cell):
+                if alive[neighbor]:
+                    toward[cell] = code[neighbor - cell]
+                    degree[neighbor] -= 1
+                    if degree[neighbor] == 1:
+                        stack.append(neighbor)
+        self.alive = alive
+        self.toward = toward
+        self.steps = (0, cols, -cols, 1, -1)
+        self.pruned = n - sum(walls) - sum(alive)
+
+        is_node = bytearray(n)
+        for cell in range(n):
+            if alive[cell] and degree[cell] != 2:
+                is_node[cell] = 1
+
+        corridors = {}
+        walked = bytearray(n) #corridor cells reached from a node
+        for node in range(n):
+            if not is_node[node]:
+                continue
+            for first in around(node):
+                if alive[first] and not is_node[first] and first not in corridors:
+                    before, cell, length = node, first, 1
+                    while not is_node[cell]:
+                        walked[cell] = 1
+                        before, cell = cell, next(c for c in around(cell) if alive[c] and c != before)
+                        length += 1
+                    if cell != node: #a loop back to the same node is never on a shortest path
+                        corridors[first] = corridors[before] = (node, cell, length)
+
+        # 沒有岔路的環上面挑一格當節點，環上其他格子才走得到節點
+        for cell in range(n):
+            if alive[cell] and not walked[cell] and not is_node[cell]:
+                is_node[cell] = 1
+                before, current = cell, next(c for c in around(cell) if alive[c])
+                while current != cell:
+                    walked[current] = 1
+                    before, current = current, next(c for c in around(current) if alive[c] and c != before)
+        self.is_node = is_node
+        self.nodes = sum(is_node)
+        self.corridors = corridors
+        self._around = around
+
+    def climb(self, source, target):
+        """
+        Climbs from source and from target up their pruned trees, a step of
+        each in turn, until the two climbs meet or each reaches a cell that
+        wasn't pruned (or the top of a lone tree). Returns both climbs as lists
+        of cells, starting at source and target; if they met, both end at the
+        cell where they did.
+        """
+        alive, toward, steps = self.alive, self.toward, self.steps
+        head, tail = [source], [target]
+        on_head, on_tail = {source: 0}, {target: 0}
+        while True:
+            if head[-1] in on_tail:
+                del tail[on_tail[head[-1]] + 1:]
+                return head, tail
+            if tail[-1] in on_head:
+                del head[on_head[tail[-1]] + 1:]
+                return head, tail
+            moved = False
+            for cells, seen in ((head, on_head), (tail, on_tail)):
+                cell = cells[-1]
+                if not alive[cell] and toward[cell]:
+                    cell += steps[toward[cell]]
+                    seen[cell] = len(cells)
+                    cells.append(cell)
+                    moved = True
+            if not moved:
+                return head, tail
+
+    def ends(self, cell):
+        """
+        Walks from a corridor cell both ways to the nodes at the corridor's
+        ends. Returns one list of cells per way, from the cell next to cell up
+        to and including the node.
+        """
+        alive, around, is_node = self.alive, self._around, self.is_node
+        walks = []
+        for first in around(cell):
+            if alive[first]:
+                before, current = cell, first
+                cells = [first]
+                while not is_node[current]:
+                    before, current = current, next(c for c in around(current) if alive[c] and c != before)
+                    cells.append(current)
+                walks.append(cells)
+        return walks
+
+    def expand(self, source, firsts):
+        """
+        Turns a path given as its first node and the first cell of each
+        corridor taken from there back into the full list of (row, col).
+        """
+        alive, around, is_node, cols = self.alive, self._around, self.is_node, self.cols
+        path = [divmod(source, cols)]
+        before = source
+        for cell in firsts:
+            path.append(divmod(cell, cols))
+            while not is_node[cell]:
+                before, cell = cell, next(c for c in around(cell) if alive[c] and c != before)
+                path.append(divmod(cell, cols))
+            before = cell
+        return path
+
+
+# CorridorGraph per maze, rebuilt if the grid changes
+_corridor_graphs = weakref.WeakKeyDictionary()
+_TARGET = -1 #corridor_astar's id for the objective, reached from the nodes next to it
+
+
+def corridor_graph(maze):
+    """Returns the CorridorGraph of the maze, building it the first time it is asked for."""
+    entry = _corridor_graphs.get(maze)
+    if entry is None or entry[0] != maze.getGridKey():
+        entry = (maze.getGridKey(), CorridorGraph(maze))
+        _corridor_graphs[maze] = entry
+    return entry[1]
+
+
+def corridor_astar(maze, stats=None):
+    """
+    Runs A star on the CorridorGraph of the maze: only junctions are expanded,
+    and a whole corridor is one step of its length.
+
+    The start and the objective are hooked up first. From a pruned cell the
+    only way out is up its tree, so both climb (CorridorGraph.climb); if the
+    climbs meet, the path is the two climbs joined there. From a corridor cell
+    the search starts at (or finishes from) both ends of the corridor, and a
+    start and objective on the same corridor also get the walk between them.
+    Manhattan distance stays admissible since a corridor is never shorter than
+    the straight line. Each expansion asks maze.getNeighborIds for its moves,
+    so getStatesExplored counts expanded nodes.
+
+    @param maze: The maze to execute the search on.
+    @param stats: optional SearchStats to fill in
+
+    @return path: a list of tuples containing the coordinates of each state in the computed path
+    """
+    start = maze.getStart()
+    objectives = maze.getObjectives()
+    if not objectives:
+        return [start]
+    graph = corridor_graph(maze)
+    cols = graph.cols
+    head, tail = graph.climb(start[0] * cols + start[1], objectives[0][0] * cols + objectives[0][1])
+    source, target = head[-1], tail[-1]
+    if source == target:
+        return [divmod(cell, cols) for cell in head + tail[-2::-1]]
+    if not graph.alive[source] or not graph.alive[target]: #a lone tree only reaches its own cells
+        return []
+    goal = divmod(target, cols)
+    is_node, corridors = graph.is_node, graph.corridors
+
+    queue = BucketQueue()
+    getNeighborIds, heuristic = maze.getNeighborIds, manhattan_distance
+    if stats is not None:
+        getNeighborIds, heuristic = stats.neighbors(getNeighborIds, queue), stats.heuristic(heuristic)
+    queued = queue.key
+    parent = {} #node -> (node before it, first cell of the corridor between them), None where the search started
+    lead = {} #node the search started at -> cells walked from source to it
+    direct = None #cells from source to target when both are on one corridor
+    for cells in graph.ends(source) if not is_node[source] else [[source]]:
+        node = cells[-1]
+        if target in cells and (direct is None or cells.index(target) < len(direct)):
+            direct = cells[:cells.index(target) + 1]
+        f_cost = len(cells) - (node == source) + heuristic(divmod(node, cols), goal)
+        if f_cost < queued.get(node, f_cost + 1):
+            parent[node] = None
+            lead[node] = cells if node != source else []
+            queue.push(node, f_cost)
+    finish = {} #node -> cells from it to target, not counting the node
+    for cells in graph.ends(target) if not is_node[target] else [[target]]:
+        node = cells[-1]
+        rest = cells[-2::-1] + [target] if node != target else []
+        if len(rest) < len(finish.get(node, rest + [target])):
+            finish[node] = rest
+    if direct is not None:
+        queue.push(_TARGET, len(direct))
+    through = None #node whose finish gave _TARGET its cost, None for direct
+
+    while queue:
+        current = queue.pop()
+        if current == _TARGET:
+            break
+
+        g_cost = queue.low - heuristic(divmod(current, cols), goal)
+        rest = finish.get(current)
+        if rest is not None and g_cost + len(rest) < queued.get(_TARGET, g_cost + len(rest) + 1):
+            through = current
+            queue.push(_TARGET, g_cost + len(rest))
+        for first in getNeighborIds(current):
+            if is_node[first]:
+                node, length = first, 1
+            else:
+                corridor = corridors.get(first)
+                if corridor is None: #pruned, or a loop
+                    continue
+                end, node, length = corridor
+                if node == current:
+                    node = end
+            if node in parent and node not in queued:
+                continue
+            f_cost = g_cost + length + heuristic(divmod(node, cols), goal)
+            if f_cost < queued.get(node, f_cost + 1):
+                parent[node] = (current, first)
+                queue.push(node, f_cost)
+    else:
+        # No path found
+        return []
+
+    if through is None:
+        return [divmod(cell, cols) for cell in head + direct + tail[-2::-1]]
+    firsts = []
+    node = through
+    while parent[node] is not None:
+        node, first = parent[node]
+        firsts.append(first)
+    path = [divmod(cell, cols) for cell in head + lead[node]]
+    path += graph.expand(node, firsts[::-1])[1:]
+    path += [divmod(cell, cols) for cell in finish[through] + tail[-2::-1]]
+    return path
+
+
+def bfs_distances(maze, source, stats=None):
+    """
+    Runs a full BFS from source without stopping at any goal.
+
+    Same frontier logic as bfs, but on integer cell ids (row * cols + col).
+
+    @param maze: The maze to execute the search on.
+    @param source: the (row, col) to start from
+    @param stats: optional SearchStats to add this run's counts to
+
+    @return dist: an array('i') over all cells with the number of steps from source, -1 if unreachable
+    """
+    rows, cols = maze.getDimensions()
+    dist = array('i', [-1]) * (rows * cols)
+    start = source[0] * cols + source[1]
+    dist[start] = 0
+    queue = deque([start])
+    getNeighborIds = maze.getNeighborIds
+    if stats is not None:
+        getNeighborIds = stats.neighbors(getNeighborIds, queue)
+        expanded, generated = stats.nodes_expanded, stats.nodes_generated
+    while queue:
+        current = queue.popleft()
+        d = dist[current] + 1
+        for neighbor in getNeighborIds(current):
+            if dist[neighbor] == -1: #dist=-1就是還沒走過，順便當visited用
+                dist[neighbor] = d
+                queue.append(neighbor)
+    if stats is not None: #走到的格子都展開過，除了起點每格都只被加入一次
+        stats.duplicates_skipped += stats.nodes_generated - generated - (stats.nodes_expanded - expanded - 1)
+    return dist
+
+
+def distance_field(maze, source):
+    """
+    Same result as bfs_distances, computed a whole BFS level at a time.
+
+    The grid is a big int bitset with one extra wall column per row (bit
+    row * (cols + 1) + col), so a shift by one or by a row moves every frontier
+    cell at once and the padding stops moves from wrapping around a row. Each
+    level is the shifted frontier masked with the cells not reached yet, so
+    the per-cell work happens inside int operations. Distances are
+    accumulated as bit planes (plane b holds the cells whose distance has bit b
+    set) and turned into the array('i') once at the end.
+
+    A level costs the same whatever its size, so this wins when levels are few
+    and wide (open areas, rooms) and loses on long one-cell corridors, where
+    bfs_distances is the better choice. Cells aren't counted in
+    getStatesExplored, since none is expanded on its own.
+
+    @param maze: The maze to execute the search on.
+    @param source: the (row, col) to start from
+
+    @return dist: an array('i') over all cells with the number of steps from source, -1 if unreachable
+    """
+    rows, cols = maze.getDimensions()
+    stride = cols + 1
+    walls = maze.getWallMask()
+    padded = b"".join(walls[row * cols:(row + 1) * cols] + b"\x01" for row in range(rows))
+    wall_bits = int.from_bytes(packBits(padded), "little")
+    everything = (1 << rows * stride) - 1
+
+    start = source[0] * stride + source[1]
+    unreached = everything ^ wall_bits ^ (1 << start)
+    frontier = 1 << start
+    planes = []
+    level = 0
+    while True:
+        level += 1
+        frontier = (frontier << 1 | frontier >> 1 | frontier << stride | frontier >> stride) & unreached
+        if not frontier:
+            break
+        #bit b of a distance d flips at every multiple of 2**b up to d, so plane b
+        #is the XOR of the "not reached before level t" sets for t = 2**b, 2*2**b, ...
+        #(1 + trailing zeros of level XORs per level, instead of one OR per set bit)
+        bit = 0
+        while True:
+            if bit == len(planes):
+                planes.append(0)
+            planes[bit] ^= unreached
+            if level >> bit & 1:
+                break
+            bit += 1
+        unreached ^= frontier
+
+    #每個cell攤成32-bit的一格，把每個plane疊上去；沒走到的cell(plane裡是雜訊)整格填成-1
+    total = _lanes(unreached | wall_bits, rows, cols) * 0xFFFFFFFF
+    for bit, plane in enumerate(planes):
+        total |= _lanes(plane, rows, cols) << bit
+    dist = array('i')
+    dist.frombytes(total.to_bytes(4 * rows * cols, "little"))
+    if sys.byteorder == "big":
+        dist.byteswap()
+    return dist
+
+
+# Padded bitset -> int with cell i of the unpadded grid in bits 32 * i .. 32 * i + 31
+# (value 0 or 1), so the distance planes can be stacked per cell
+def _lanes(bits, rows, cols):
+    size = rows * (cols + 1)
+    cells = unpackBits(bits.to_bytes((size + 7) // 8, "little"), size)
+    del cells[cols::cols + 1] #drop the padding column
+    lanes = bytearray(4 * len(cells))
+    lanes[0::4] = cells
+    return int.from_bytes(lanes, "little")
+
+
+def field_path(maze, field, start):
+    """
+    Walks down a distance field from start to its source.
+
+    @param maze: the maze the field was computed on
+    @param field: a distance field from distance_field or bfs_distances
+    @param start: the (row, col) to start from
+
+    @return path: list of (row, col) from start to the field's source, [] if start is unreachable
+    """
+    cols = maze.getDimensions()[1]
+    cell = start[0] * cols + start[1]
+    d = field[cell]
+    if d < 0:
+        return []
+    path = [start]
+    size = len(field)
+    while d > 0:
+        d -= 1
+        row, col = divmod(cell, cols)
+        #同bfs的鄰居順序：下、上、右、左
+        for neighbor, ok in ((cell + cols, cell + cols < size), (cell - cols, cell >= cols),
+                             (cell + 1, col + 1 < cols), (cell - 1, col > 0)):
+            if ok and field[neighbor] == d:
+                cell = neighbor
+                break
+        path.append(divmod(cell, cols))
+    return path
+
+
+def bfs_path(maze, start, goal, stats=None):
+    """
+    Runs BFS between two explicit points, without touching the maze's start or objectives.
+
+    @param maze: The maze to execute the search on.
+    @param start: the (row, col) to start from
+    @param goal: the (row, col) to reach
+    @param stats: optional SearchStats to add this run's counts to
+
+    @return path: a list of tuples containing the coordinates of each state in the computed path
+    """
+    cols = maze.getDimensions()[1]
+    source = start[0] * cols + start[1]
+    target = goal[0] * cols + goal[1]
+    parent = {source: None}
+    queue = deque([source])
+    getNeighborIds = maze.getNeighborIds
+    if stats is not None:
+        getNeighborIds = stats.neighbors(getNeighborIds, queue)
+        generated = stats.nodes_generated
+    while queue:
+        current = queue.popleft()
+        if current == target:
+            break
+        for neighbor in getNeighborIds(current):
+            if neighbor not in parent:
+                parent[neighbor] = current
+                queue.append(neighbor)
+    else:
+        current = None
+    if stats is not None:
+        stats.duplicates_skipped += stats.nodes_generated - generated - (len(parent) - 1)
+    path = []
+    while current is not None:
+        path.append(divmod(current, cols))
+        current = parent[current]
+    path.reverse()
+    return path
+
+
+class DStarLite:
+    """
+    D* Lite planner toward one goal that keeps its search between calls.
+
+    It searches backwards from the goal, so when the start moves (setStart) or
+    walls change (setWall/clearWall, picked up through a wall listener), plan()
+    only repairs the cells whose distance actually changed instead of starting
+    over. Cells are integer ids (row * cols + col); g and rhs live in array('i').
+
+    expanded is the number of cells taken off the queue by the last plan(),
+    which is what a replan costs.
+    """
+
+    INF = 1 << 30
+
+    def __init__(self, maze, goal=None):
+        self.maze = maze
+        rows, self.cols = maze.getDimensions()
+        self.goal_pos = goal if goal is not None else maze.getObjectives()[0]
+        self.goal = self._id(self.goal_pos)
+        self.walls = bytearray(maze.getWallMask())
+        self.g = array('i', [self.INF]) * (rows * self.cols)
+        self.rhs = array('i', [self.INF]) * (rows * self.cols)
+        self.km = 0
+        self.heap = []
+        self.queued = {} #cell -> key it is queued with; heap entries with another key are stale
+        self.changed = set()
+        self.last = self._id(maze.getStart())
+        self.expanded = 0
+        self.rhs[self.goal] = 0
+        self._push(self.goal)
+        maze.addWallListener(self._wall_changed)
+
+    def close(self):
+        """Stops listening to the maze's wall changes."""
+        self.maze.removeWallListener(self._wall_changed)
+
+    def plan(self):
+        """
+        Returns the shortest path from the maze's current start to the goal,
+        [] if there is none, repairing the search for whatever changed since
+        the last call.
+        """
+        start = self._id(self.maze.getStart())
+        self.expanded = 0
+        if start != self.last: #起點移動了，舊的key都差了這段距離
+            self.km += self._h(self.last, start)
+            self.last = start
+        if self.changed:
+            cols, rows = self.cols, len(self.walls) // self.cols
+            for cell in self.changed:
+                row, col = divmod(cell, cols)
+                self.walls[cell] = self.maze.isWall(row, col)
+                self._update(cell, start)
+                for neighbor, inside in ((cell + cols, row + 1 < rows), (cell - cols, row > 0),
+                                         (cell + 1, col + 1 < cols), (cell - 1, col > 0)):
+                    if inside:
+                        self._update(neighbor, start)
+            self.changed.clear()
+        self._compute(start)
+        return self._path(start)
+
+    def _wall_changed(self, row, col, isWall):
+        self.changed.add(row * self.cols + col)
+
+    def _id(self, pos):
+        return pos[0] * self.cols + pos[1]
+
+    def _h(self, a, b):
+        ar, ac = divmod(a, self.cols)
+        br, bc = divmod(b, self.cols)
+        return abs(ar - br) + abs(ac - bc)
+
+    def _key(self, cell, start):
+        m = min(self.g[cell], self.rhs[cell])
+        return (m + self._h(start, cell) + self.km, m)
+
+    def _push(self, cell, start=None):
+        key = self._key(cell, self.last if start is None else start)
+        self.queued[cell] = key
+        heapq.heappush(self.heap, (key[0], key[1], cell))
+
+    def _update(self, cell, start):
+        g, rhs, INF = self.g, self.rhs, self.INF
+        if cell != self.goal:
+            best = INF
+            if not self.walls[cell]:
+                for neighbor in self.maze.getNeighborIds(cell):
+                    if g[neighbor] + 1 < best:
+                        best = g[neighbor] + 1
+            rhs[cell] = best
+        if g[cell] != rhs[cell]:
+            self._push(cell, start)
+        else:
+            self.queued.pop(cell, None)
+
+    def _compute(self, start):
+        g, rhs, heap, queued, INF = self.g, self.rhs, self.heap, self.queued, self.INF
+        getNeighborIds = self.maze.getNeighborIds
+        while True:
+            while heap and queued.get(heap[0][2]) != heap[0][:2]:
+                heapq.heappop(heap) #stale entry
+            if not heap:
+                return
+            if heap[0][:2] >= self._key(start, start) and rhs[start] == g[start]:
+                return
+            k1, k2, cell = heapq.heappop(heap)
+            del queued[cell]
+            self.expanded += 1
+            key = self._key(cell, start)
+            if (k1, k2) < key: #key got stale because the start moved
+                self._push(cell, start)
+            elif g[cell] > rhs[cell]: #overconsistent: settle it
+                g[cell] = rhs[cell]
+                for neighbor in getNeighborIds(cell):
+                    self._update(neighbor, start)
+            else: #underconsistent: its old distance is gone, redo it and its neighbors
+                g[cell] = INF
+                self._update(cell, start)
+                for neighbor in getNeighborIds(cell):
+                    self._update(neighbor, start)
+
+    def _path(self, start):
+        g, INF = self.g, self.INF
+        if g[start] >= INF or self.walls[start]:
+            return []
+        cell = start
+        path = [divmod(cell, self.cols)]
+        while cell != self.goal:
+            best = min(self.maze.getNeighborIds(cell), key=g.__getitem__, default=None)
+            if best is None or g[best] >= INF:
+                return []
+            cell = best
+            path.append(divmod(cell, self.cols))
+        return path
+
+
+class SearchContext:
+    """
+    Reusable state for many point-to-point queries against one maze.
+
+    g-cost, parent and visited markers live in flat arrays indexed by cell id
+    (row * cols + col), allocated once. Instead of clearing them, every query
+    bumps a generation number: a cell counts as reached (or closed) only if its
+    stamp equals the current generation, so starting a new query is O(1).
+    Queries take an explicit start and goal and never touch the maze's own
+    start/objectives.
+    """
+
+    def __init__(self, maze):
+        self.maze = maze
+        rows, cols = maze.getDimensions()
+        self.cols = cols
+        size = rows * cols
+        self.g_cost = array('i', [0]) * size
+        self.parent = array('i', [-1]) * size
+        self.reached = array('I', [0]) * size #這一輪有沒有走到過
+        self.closed = array('I', [0]) * size #這一輪有沒有展開過 (A*)
+        self.generation = 0
+        self.queue = deque()
+        self.frontier = BucketQueue()
+
+    def _new_query(self):
+        self.generation += 1
+        if self.generation > 0xFFFFFFFF: #stamp用完了才真的清一次
+            size = len(self.reached)
+            self.reached = array('I', [0]) * size
+            self.closed = array('I', [0]) * size
+            self.generation = 1
+        return self.generation
+
+    def _path_to(self, source, target):
+        return _cell_path(self.parent, source, target, self.cols)
+
+    def bfs(self, start, goal):
+        """
+        Runs BFS from start to goal.
+
+        @param start: the (row, col) to start from
+        @param goal: the (row, col) to reach
+
+        @return path: a list of tuples containing the coordinates of each state in the computed path
+        """
+        generation = self._new_query()
+        cols = self.cols
+        source = start[0] * cols + start[1]
+        target = goal[0] * cols + goal[1]
+        reached, parent = self.reached, self.parent
+        get_neighbors = self.maze.getNeighborIds
+        queue = self.queue
+        queue.clear()
+        queue.append(source)
+        reached[source] = generation
+        while queue:
+            current = queue.popleft()
+            if current == target:
+                return self._path_to(source, target)
+            for neighbor in get_neighbors(current):
+                if reached[neighbor] != generation:
+                    reached[neighbor] = generation
+                    parent[neighbor] = current
+                    queue.append(neighbor)
+        return []
+
+    def astar(self, start, goal):
+        """
+        Runs A star from start to goal with Manhattan distance.
+
+        @param start: the (row, col) to start from
+        @param goal: the (row, col) to reach
+
+        @return path: a list of tuples containing the coordinates of each state in the computed path
+        """
+        generation = self._new_query()
+        cols = self.cols
+        source = start[0] * cols + start[1]
+        target = goal[0] * cols + goal[1]
+        goal_row, goal_col = goal
+        reached, closed, parent, g_cost = self.reached, self.closed, self.parent, self.g_cost
+        get_neighbors = self.maze.getNeighborIds
+        frontier = self.frontier
+        frontier.clear() #an earlier query may have stopped with cells still queued
+        reached[source] = generation
+        g_cost[source] = 0
+        frontier.push(source, manhattan_distance(start, goal))
+        while frontier:
+            current = frontier.pop()
+            closed[current] = generation
+            if current == target:
+                return self._path_to(source, target)
+            new_g_cost = g_cost[current] + 1
+            for neighbor in get_neighbors(current):
+                if closed[neighbor] == generation:
+                    continue
+                if reached[neighbor] != generation or new_g_cost < g_cost[neighbor]:
+                    reached[neighbor] = generation
+                    g_cost[neighbor] = new_g_cost
+                    parent[neighbor] = current
+                    row, col = divmod(neighbor, cols)
+                    frontier.push(neighbor, new_g_cost + abs(row - goal_row) + abs(col - goal_col))
+        return []
+
+
+class DistanceMatrix:
+    """
+    True maze distances between every pair of points of a multi-objective search.
+
+    Point 0 is the start and points 1..k are the objectives, in getObjectives order.
+    Distances live in one flat array('i'), -1 for unreachable pairs.
+
+    Sets of objectives are passed around as bitmasks: bit j stands for point j + 1.
+    """
+
+    def __init__(self, points, dist):
+        self.points = points
+        self.size = len(points)
+        self.index = {p: i for i, p in enumerate(points)}
+        self.dist = dist
+        self._mst_cache = OrderedDict()
+
+    # Distance between point indices i and j
+    def get(self, i, j):
+        return self.dist[i * self.size + j]
+
+    # Distance between two (row, col) points of the matrix
+    def between(self, a, b):
+        return self.dist[self.index[a] * self.size + self.index[b]]
+
+    # Cost of the minimum spanning tree over the objectives in mask (Prim's).
+    # Memoized per mask in a bounded LRU that lives as long as the cached matrix,
+    # so every search on the same map shares it.
+    def mst(self, mask):
+        cost = self._mst_cache.get(mask)
+        if cost is not None:
+            self._mst_cache.move_to_end(mask)
+            return cost
+
+        nodes = [j for j in range(1, self.size) if mask >> (j - 1) & 1]
+        cost = 0
+        if nodes:
+            dist, size = self.dist, self.size
+            first = nodes.pop()
+            best = {j: dist[first * size + j] for j in nodes} #每個點連到樹上的最短邊
+            while best:
+                j = min(best, key=best.get)
+                cost += best.pop(j)
+                row = j * size
+                for other in best:
+                    if dist[row + other] < best[other]:
+                        best[other] = dist[row + other]
+
+        self._mst_cache[mask] = cost
+        if len(self._mst_cache) > MST_CACHE_SIZE:
+            self._mst_cache.popitem(last=False)
+        return cost
+
+
+# Recently built matrices keyed on (grid key, points), see objective_distances
+_distance_cache = OrderedDict()
+DISTANCE_CACHE_SIZE = 32
+MST_CACHE_SIZE = 1 << 16
+
+
+def objective_distances(maze, stats=None):
+    """
+    Returns the DistanceMatrix between the start and all objectives of the maze.
+
+    Runs one bfs_distances per point (the last one is covered by symmetry).
+    Results are cached on the grid contents and the points, so asking again for
+    the same maze (or another Maze loaded from the same map) costs nothing.
+
+    @param maze: The maze to execute the search on.
+    @param stats: optional SearchStats to add the BFS runs' counts to
+
+    @return: a DistanceMatrix
+    """
+    points = [maze.getStart()] + maze.getObjectives()
+    key = (maze.getGridKey(), tuple(points))
+    matrix = _distance_cache.get(key)
+    if matrix is not None:
+        _distance_cache.move_to_end(key)
+        return matrix
+
+    cols = maze.getDimensions()[1]
+    size = len(points)
+    dist = array('i', [0]) * (size * size)
+    for i in range(size - 1):
+        field = bfs_distances(maze, points[i], stats)
+        for j in range(i + 1, size):
+            d = field[points[j][0] * cols + points[j][1]]
+            dist[i * size + j] = d
+            dist[j * size + i] = d
+    matrix = DistanceMatrix(points, dist)
+
+    _distance_cache[key] = matrix
+    if len(_distance_cache) > DISTANCE_CACHE_SIZE:
+        _distance_cache.popitem(last=False)
+    return matrix
+
+
+HEURISTIC_CACHE_BYTES = 64 << 20
+_heuristic_caches = weakref.WeakKeyDictionary()
+
+
+class HeuristicCache:
+    """
+    Heuristics for astar toward goals that get queried again and again.
+
+    A goal asked for promote_after times gets an exact distance field (one
+    bfs_distances from the goal, as array('i')), so astar with it only expands
+    cells that lie on a shortest path. Fields are kept in LRU order and evicted
+    so that they and the landmark fields fit in max_bytes.
+
+    Other goals get the ALT bound instead: for landmarks L with known fields,
+    |d(L, goal) - d(L, cell)| never overestimates d(cell, goal), and the best of
+    those and the Manhattan distance is used. Landmarks are picked farthest-first
+    from the start the first time they're needed.
+    """
+
+    def __init__(self, maze, max_bytes=HEURISTIC_CACHE_BYTES, landmarks=4, promote_after=2):
+        self.maze = maze
+        self.rows, self.cols = maze.getDimensions()
+        field_bytes = 4 * self.rows * self.cols
+        capacity = max_bytes // field_bytes #how many fields fit under the cap
+        self.landmark_count = min(landmarks, capacity)
+        self.field_capacity = capacity - self.landmark_count
+        self.promote_after = promote_after
+        self.fields = OrderedDict() #goal -> array('i') distance field, oldest first
+        self.uses = {}
+        self.landmarks = None #[(landmark, field)], built lazily
+        self.hits = self.misses = 0
+
+    def heuristic(self, goal):
+        """
+        Returns a heuristic h(pos, goal) for one search toward goal, with the
+        same signature as manhattan_distance. Counts as one use of the goal.
+        """
+        uses = self.uses.get(goal, 0) + 1
+        self.uses[goal] = uses
+        field = self.fields.get(goal)
+        if field is not None:
+            self.fields.move_to_end(goal)
+            self.hits += 1
+        else:
+            self.misses += 1
+            if uses >= self.promote_after and self.field_capacity > 0:
+                field = self.add(goal)
+        if field is not None:
+            return self._exact(field)
+        return self._alt(goal)
+
+    def add(self, goal):
+        """Computes and caches the distance field of goal, evicting old ones if needed."""
+        field = self.fields.get(goal)
+        if field is None:
+            field = bfs_distances(self.maze, goal)
+            self.fields[goal] = field
+            while len(self.fields) > self.field_capacity:
+                self.fields.popitem(last=False)
+        return field
+
+    def unreachable(self, start, goal):
+        """
+        True if a cached field shows there is no path from start to goal: the
+        exact field of goal doesn't reach start, or a landmark field reaches
+        one of them but not the other.
+        """
+        cols = self.cols
+        cell, target = start[0] * cols + start[1], goal[0] * cols + goal[1]
+        field = self.fields.get(goal)
+        if field is not None:
+            return field[cell] < 0
+        for _, field in self.landmarks or ():
+            if (field[cell] < 0) != (field[target] < 0):
+                return True
+        return False
+
+    def memory(self):
+        """Bytes held by the cached and landmark fields."""
+        return 4 * self.rows * self.cols * (len(self.fields) + len(self.landmarks or ()))
+
+    def _exact(self, field):
+        cols = self.cols
+        unreachable = self.rows * cols #goal不在同一個連通區域，比任何真實距離都大；astar會先用unreachable()擋掉這種查詢
+        def exact(pos, goal):
+            d = field[pos[0] * cols + pos[1]]
+            return d if d >= 0 else unreachable
+        return exact
+
+    def _alt(self, goal):
+        if self.landmarks is None:
+            self.landmarks = self._pick_landmarks()
+        cols = self.cols
+        bounds = [(field, field[goal[0] * cols + goal[1]]) for _, field in self.landmarks]
+        bounds = [(field, to_goal) for field, to_goal in bounds if to_goal >= 0]
+        if not bounds:
+            return manhattan_distance
+        def alt(pos, goal):
+            h = abs(pos[0] - goal[0]) + abs(pos[1] - goal[1])
+            cell = pos[0] * cols + pos[1]
+            for field, to_goal in bounds:
+                d = field[cell]
+                if d >= 0 and abs(to_goal - d) > h:
+                    h = abs(to_goal - d)
+            return h
+        return alt
+
+    # Farthest-first: each landmark is the reachable cell farthest from the ones before it
+    def _pick_landmarks(self):
+        landmarks = []
+        if self.landmark_count == 0:
+            return landmarks
+        nearest = bfs_distances(self.maze, self.maze.getStart())
+        for _ in range(self.landmark_count):
+            best = max(range(len(nearest)), key=nearest.__getitem__)
+            if nearest[best] <= 0:
+                break
+            landmark = divmod(best, self.cols)
+            field = bfs_distances(self.maze, landmark)
+            landmarks.append((landmark, field))
+            nearest = array('i', [min(a, b) for a, b in zip(nearest, field)])
+        return landmarks
+
+
+def heuristic_cache(maze, max_bytes=HEURISTIC_CACHE_BYTES, landmarks=4, promote_after=2):
+    """
+    Returns the HeuristicCache of the maze, creating it (with these settings)
+    the first time it is asked for, or when the walls have changed.
+    """
+    entry = _heuristic_caches.get(maze)
+    if entry is None or entry[0] != maze.getGridKey():
+        entry = (maze.getGridKey(), HeuristicCache(maze, max_bytes, landmarks, promote_after))
+        _heuristic_caches[maze] = entry
+    return entry[1]
+
+
+def clear_caches():
+    """
+    Empties the module-level caches (distance matrices, jump tables, corridor
+    graphs, heuristic caches), so the next search pays for building them again.
+    """
+    _distance_cache.clear()
+    _jump_tables.clear()
+    _corridor_graphs.clear()
+    _heuristic_caches.clear()
+
+
+def astar_corner(maze, stats=None):
     """
     Runs A star for part 2 of the assignment in the case where there are four corner objectives.
 
+    The corners are just a small multi-objective problem, so this is astar_multi.
+
     @param maze: The maze to execute the search on.
+    @param stats: optional SearchStats to fill in
 
     @return path: a list of tuples containing the coordinates of each state in the computed path
         """
-    # TODO: Write your code here
-    return []
+    return astar_multi(maze, stats)
 
-def astar_multi(maze):
+def astar_multi(maze, stats=None):
     """
     Runs A star for part 3 of the assignment in the case where there are
     multiple objectives.
 
+    The search runs over the objective graph of objective_distances: a state is
+    (current point, bitmask of remaining objectives) packed into one int as
+    mask << shift | point, and every edge goes straight to one remaining objective
+    at its true maze distance. The heuristic is the distance to the nearest
+    remaining objective plus the MST of the remaining ones (DistanceMatrix.mst).
+    The cell path is spliced together from bfs_path segments at the end.
+
     @param maze: The maze to execute the search on.
+    @param stats: optional SearchStats to fill in; an expansion is a state of the
+        objective graph and its neighbors are the objectives worth going to next
 
     @return path: a list of tuples containing the coordinates of each state in the computed path
     """
-    # TODO: Write your code here
-    return []
+    start = maze.getStart()
+    objectives = maze.getObjectives()
+    if not objectives:
+        return [start]
+
+    matrix = objective_distances(maze)
+    size = matrix.size
+    dist = matrix.dist
+    if any(dist[j] < 0 for j in range(1, size)): #有目標點走不到
+        return []
 
+    shift = size.bit_length() #state的低shift個bit放目前所在的點，上面放剩下目標的mask
+    point_mask = (1 << shift) - 1
 
-def fast(maze):
+    def heuristic(point, mask):
+        if not mask:
+            return 0
+        row = point * size
+        nearest = min(dist[row + j] for j in range(1, size) if mask >> (j - 1) & 1)
+        return nearest + matrix.mst(mask)
+
+    def successors(state): #(下一個要去的目標, 距離)
+        mask = state >> shift
+        row = (state & point_mask) * size
+        targets = [j for j in range(1, size) if mask >> (j - 1) & 1]
+        moves = []
+        for point in targets:
+            # Going straight to point is pointless if another remaining objective
+            # lies on a shortest path to it: the route through that one costs the same
+            d = dist[row + point]
+            if not any(dist[row + other] + dist[other * size + point] == d for other in targets if other != point):
+                moves.append((point, d))
+        return moves
+
+    full = (1 << (size - 1)) - 1
+    start_state = full << shift
+    g_cost = {start_state: 0}
+    parent = {start_state: None}
+    queue = BucketQueue() #state也是int，f一樣的時候先拿最後放進去的
+    if stats is not None:
+        successors, heuristic = stats.neighbors(successors, queue), stats.heuristic(heuristic)
+    queue.push(start_state, heuristic(0, full))
+
+    while queue:
+        state = queue.pop()
+        cost = g_cost[state]
+        mask = state >> shift
+        if not mask:
+            break
+        for point, d in successors(state):
+            new_g = cost + d
+            next_mask = mask ^ (1 << (point - 1))
+            next_state = next_mask << shift | point
+            if new_g < g_cost.get(next_state, new_g + 1):
+                g_cost[next_state] = new_g
+                parent[next_state] = state
+                queue.push(next_state, new_g + heuristic(point, next_mask))
+    else:
+        return []
+
+    order = []
+    while state is not None:
+        order.append(matrix.points[state & point_mask])
+        state = parent[state]
+    order.reverse()
+
+    path = [start]
+    for a, b in zip(order, order[1:]):
+        path.extend(bfs_path(maze, a, b)[1:])
+    return path
+
+
+def fast(maze, time_budget=0.1, node_budget=None, stats=None):
     """
     Runs suboptimal search algorithm for part 4.
 
+    Returns the best path fast_anytime finds within the budget.
+
     @param maze: The maze to execute the search on.
+    @param time_budget: seconds to spend improving the first tour - default 0.1, None for no limit
+    @param node_budget: number of improvement moves to try - default no limit
+    @param stats: optional SearchStats to fill in; the expansions are those of the
+        BFS runs for the distance matrix and the path segments
 
     @return path: a list of tuples containing the coordinates of each state in the computed path
     """
-    # TODO: Write your code here
-    return []
+    path = []
+    for path in fast_anytime(maze, time_budget, node_budget, stats):
+        pass
+    return path
+
+
+def fast_anytime(maze, time_budget=None, node_budget=None, stats=None):
+    """
+    Anytime multi-objective search: yields valid paths, each shorter than the last.
+
+    The first path is the greedy nearest-objective tour over objective_distances,
+    which comes out as soon as the distance matrix is ready. The objective order
+    is then improved with 2-opt and or-opt moves on the cached pairwise distances
+    until no move helps or a budget runs out. Stop iterating at any time to keep
+    the best path so far.
+
+    @param maze: The maze to execute the search on.
+    @param time_budget: seconds (counted from the call) after which no more improvements are tried
+    @param node_budget: number of improvement moves to try
+    @param stats: optional SearchStats to add the BFS runs' counts to
+
+    @return: a generator of paths (lists of (row, col) tuples)
+    """
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    start = maze.getStart()
+    if not maze.getObjectives():
+        yield [start]
+        return
+
+    matrix = objective_distances(maze, stats)
+    size = matrix.size
+    dist = matrix.dist
+    if any(dist[j] < 0 for j in range(1, size)): #有目標點走不到
+        yield []
+        return
+
+    #貪心：每次都去最近的那個目標點
+    order = [0]
+    left = set(range(1, size))
+    while left:
+        row = order[-1] * size
+        nearest = min(left, key=lambda j: dist[row + j])
+        left.remove(nearest)
+        order.append(nearest)
+
+    segments = {}
+    path, order = _splice_tour(maze, matrix, order, segments, stats)
+    yield path
+
+    moves = 0
+    def out_of_budget():
+        return (node_budget is not None and moves >= node_budget) or \
+               (deadline is not None and time.perf_counter() > deadline)
+
+    improved = True
+    while improved and not out_of_budget():
+        improved = False
+        last = len(order) - 1
+
+        # 2-opt: reverse order[i..j]
+        for i in range(1, last):
+            a, b = order[i - 1], order[i]
+            for j in range(i + 1, last + 1):
+                moves += 1
+                c = order[j]
+                old = dist[a * size + b]
+                new = dist[a * size + c]
+                if j < last:
+                    e = order[j + 1]
+                    old += dist[c * size + e]
+                    new += dist[b * size + e]
+                if new < old:
+                    order[i:j + 1] = order[i:j + 1][::-1]
+                    b = order[i]
+                    improved = True
+            if out_of_budget():
+                break
+
+        # or-opt: move a run of 1-3 objectives somewhere else, possibly reversed
+        for length in (1, 2, 3):
+            i = 1
+            while i + length <= len(order) and not out_of_budget():
+                run = order[i:i + length]
+                rest = order[:i] + order[i + length:]
+                prev = order[i - 1]
+                gain = dist[prev * size + run[0]]
+                if i + length < len(order):
+                    nxt = order[i + length]
+                    gain += dist[run[-1] * size + nxt] - dist[prev * size + nxt]
+                best = None
+                for p in range(len(rest)):
+                    x = rest[p]
+                    y = rest[p + 1] if p + 1 < len(rest) else None
+                    for seq in (run, run[::-1]):
+                        moves += 1
+                        cost = dist[x * size + seq[0]]
+                        if y is not None:
+                            cost += dist[seq[-1] * size + y] - dist[x * size + y]
+                        if cost < gain and (best is None or cost < best[0]):
+                            best = (cost, p, seq)
+                if best is not None:
+                    _, p, seq = best
+                    order = rest[:p + 1] + seq + rest[p + 1:]
+                    improved = True
+                i += 1
+
+        candidate, candidate_order = _splice_tour(maze, matrix, order, segments, stats)
+        if len(candidate) < len(path):
+            path, order = candidate, candidate_order
+            yield path
+
+
+def _splice_tour(maze, matrix, order, segments, stats=None):
+    """
+    Builds the cell path for a tour (a list of point indices starting with 0) out of
+    bfs_path segments, memoized in segments.
+
+    Objectives that the path walks over before their turn come are counted then,
+    so the returned order (the order of first visits) never costs more than the
+    one given.
+    """
+    points = matrix.points
+    while True:
+        path = [points[0]]
+        for a, b in zip(order, order[1:]):
+            segment = segments.get((a, b))
+            if segment is None:
+                segment = bfs_path(maze, points[a], points[b], stats)
+                segments[(a, b)] = segment
+                segments[(b, a)] = segment[::-1]
+            path.extend(segment[1:])
+
+        #照實際第一次走到的順序重排，走過頭吃到的點就不用再回去
+        first_visits = [0]
+        seen = {0}
+        for pos in path:
+            j = matrix.index.get(pos)
+            if j is not None and j not in seen:
+                seen.add(j)
+                first_visits.append(j)
+        if first_visits == order:
+            return path, order
+        order = first_visits
+
+
+#search()的調度表，放在最後才能引用上面所有的函數
+SEARCH_METHODS = {
+    "bfs": bfs,
+    "astar": astar,
+    "astar_corner": astar_corner,
+    "astar_multi": astar_multi,
+    "fast": fast,
+    "bidirectional_bfs": bidirectional_bfs,
+    "bidirectional_astar": bidirectional_astar,
+    "jps": jps,
+    "jps_plus": jps_plus,
+    "corridor": corridor_astar,
+}
@@ -0,0 +1,186 @@
+# service.py
+# ---------------
+# asyncio front end that answers path queries on one shared Maze without
+# blocking the event loop.
+
+"""
+PathService loads a maze once and serves (start, goals, method) queries.
+Searches run in a thread pool through run_in_executor. Each worker thread keeps
+one shallow copy of the maze and sets the query's start and objectives on it
+(the grid and neighbor table are shared, nothing is reloaded). Reusing the copy
+keeps the caches search holds per Maze object (jump_table, corridor_graph)
+warm from one query to the next; a wall change makes the thread copy again,
+so the copy's grid key and caches follow the new walls.
+
+The copies are not snapshots: they share the grid and neighbor table with the
+service's maze, so a setWall/clearWall while a search is running changes the
+cells that search is reading. Its answer may then be wrong for both the old
+and the new walls, and it is still cached under the old wall version, which
+no later query asks for. Change walls between queries (or when
+metrics()["queue_depth"] is 0) if every answer has to be exact.
+
+Identical queries that arrive while one is being searched wait on the same
+future instead of searching again. Finished paths go into an LRU cache keyed
+on the query and the maze's wall version, so a wall change (Maze.setWall /
+clearWall) makes older answers unreachable and they age out.
+
+The searches are pure Python, so the pool keeps the loop responsive but
+doesn't run them in parallel (the GIL); workers=1 is usually enough.
+
+Running this file starts a local client that fires a batch of overlapping
+queries at a map and prints the metrics.
+"""
+
+import argparse
+import asyncio
+import copy
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from maze import load_maze
+from search import SEARCH_METHODS, search
+
+LATENCY_WINDOW = 1024 #latencies kept for the percentiles in metrics()
+
+
+class PathService:
+    def __init__(self, maze, workers=1, cache_size=1024):
+        """
+        @param maze: a Maze, or a filename to load one from
+        @param workers: threads in the search pool
+        @param cache_size: finished paths kept in the result cache
+        """
+        self.maze = load_maze(maze) if isinstance(maze, str) else maze
+        self.maze.buildNeighborTable() #now, so every worker's copy shares it
+        self.views = {} #worker thread id -> (wall version, its copy of the maze)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.cache_size = cache_size
+        self.cache = OrderedDict() #key -> path as a tuple, oldest first
+        self.inflight = {} #key -> future of the running search
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counts = {"requests": 0, "cache_hits": 0, "coalesced": 0, "searches": 0, "errors": 0}
+        self.states_explored = 0
+
+    async def query(self, start, goals, method="astar"):
+        """
+        Returns the path from start through goals found by method, as a list of
+        (row, col).
+
+        @param start: (row, col) to start from
+        @param goals: iterable of (row, col) objectives
+        @param method: a search() method name
+        """
+        if method not in SEARCH_METHODS:
+            raise ValueError("Unknown search method %r" % (method,))
+        t = time.perf_counter()
+        self.counts["requests"] += 1
+        key = (tuple(start), tuple(map(tuple, goals)), method, self.maze.getWallVersion())
+        try:
+            path = self.cache.get(key)
+            if path is not None:
+                self.cache.move_to_end(key)
+                self.counts["cache_hits"] += 1
+                return list(path)
+
+            future = self.inflight.get(key)
+            if future is not None:
+                self.counts["coalesced"] += 1
+            else:
+                future = asyncio.ensure_future(self._search(key))
+                self.inflight[key] = future
+            #shield: one caller being cancelled must not cancel the search the others wait on
+            return list(await asyncio.shield(future))
+        finally:
+            self.latencies.append(time.perf_counter() - t)
+
+    async def _search(self, key):
+        start, goals, method, _ = key
+        self.counts["searches"] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            path, explored = await loop.run_in_executor(self.executor, _run_query, self.maze, self.views, start, goals, method)
+        except Exception:
+            self.counts["errors"] += 1
+            raise
+        finally:
+            del self.inflight[key]
+        self.states_explored += explored
+        path = tuple(path)
+        self.cache[key] = path
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return path
+
+    def metrics(self):
+        """
+        Returns a dict of counters: requests, cache_hits, coalesced, searches,
+        errors, queue_depth (searches running or waiting for a worker),
+        cache_size, states_explored, and latency_p50 / latency_p95 / latency_max
+        in seconds over the last LATENCY_WINDOW requests.
+        """
+        result = dict(self.counts, queue_depth=len(self.inflight), cache_size=len(self.cache),
+                      states_explored=self.states_explored)
+        latencies = sorted(self.latencies)
+        if latencies:
+            result["latency_p50"] = latencies[len(latencies) // 2]
+            result["latency_p95"] = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+            result["latency_max"] = latencies[-1]
+        return result
+
+    def close(self):
+        """Shuts the worker pool down, waiting for running searches."""
+        self.executor.shutdown(wait=True)
+
+
+# Runs one query in a worker thread, on the thread's copy of the maze so the
+# shared one's start, objectives and explored-state count aren't touched. The
+# copy is made again when the walls have changed, since it keeps its own grid key
+def _run_query(maze, views, start, goals, method):
+    thread = threading.get_ident()
+    version = maze.getWallVersion()
+    entry = views.get(thread)
+    if entry is None or entry[0] != version:
+        entry = (version, copy.copy(maze))
+        views[thread] = entry
+    view = entry[1]
+    view.setStart(start)
+    view.setObjectives(goals)
+    before = view.getStatesExplored()
+    path = search(view, method)
+    return path, view.getStatesExplored() - before
+
+
+async def _client(service, queries, rounds):
+    for _ in range(rounds):
+        paths = await asyncio.gather(*(service.query(*query) for query in queries))
+        print("Answered", len(paths), "queries, path lengths", sorted(set(map(len, paths))))
+    for name, value in service.metrics().items():
+        print("%-16s %s" % (name, value))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='HW1 path query service, local client')
+
+    parser.add_argument('filename',
+                        help='path to maze file [REQUIRED]')
+    parser.add_argument('--method', dest="method", type=str, default = "astar", choices = sorted(SEARCH_METHODS),
+                        help='search method - default astar')
+    parser.add_argument('--queries', dest="queries", type=int, default = 20,
+                        help='concurrent queries per round, half of them the same - default 20')
+    parser.add_argument('--rounds', dest="rounds", type=int, default = 3,
+                        help='rounds of queries - default 3')
+
+    args = parser.parse_args()
+    service = PathService(args.filename)
+    maze = service.maze
+    start, goals = maze.getStart(), maze.getObjectives()
+    rows, cols = maze.getDimensions()
+    openCells = [(row, col) for row in range(rows) for col in range(cols) if not maze.isWall(row, col)]
+    queries = [(start, goals, args.method)] * (args.queries // 2)
+    queries += [(openCells[i * len(openCells) // args.queries], goals, args.method)
+                for i in range(args.queries - len(queries))]
+    asyncio.run(_client(service, queries, args.rounds))
+    service.close()
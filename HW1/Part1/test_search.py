@@ -3,11 +3,13 @@
 Simple test script for Part 1 without GUI dependencies
 """
 
+import contextlib
+import json
 import sys
 sys.path.insert(0, '.')
 
-from maze import Maze
-from search import bfs, astar
+from maze import Maze, compile_maps
+from search import BucketQueue, SearchContext, SearchStats, search, search_steps, bfs, astar, bidirectional_bfs, bidirectional_astar, jps, jps_plus, jump_table, astar_corner, astar_multi, fast, fast_anytime, search_many, objective_distances, bfs_distances, HeuristicCache, heuristic_cache, distance_field, field_path, bfs_path, DStarLite, corridor_astar, corridor_graph, manhattan_distance
 
 def test_maze(maze_path, method_name):
     print(f"\n{'='*60}")
@@ -40,6 +42,689 @@ def test_maze(maze_path, method_name):
     
     return len(path), states_explored
 
+test_maze.__test__ = False #a report helper for the script run below, not a pytest test
+
+
+def test_bfs_astar():
+    # A star must find paths as short as BFS's without exploring more states
+    for maze_path in ["maps/single/tinyMaze.txt", "maps/single/smallMaze.txt", "maps/single/bigMaze.txt"]:
+        maze, reference = Maze(maze_path), Maze(maze_path)
+        path, expected = astar(maze), bfs(reference)
+        assert maze.isValidPath(path) == reference.isValidPath(expected) == "Valid"
+        assert len(path) == len(expected)
+        assert maze.getStatesExplored() <= reference.getStatesExplored()
+
+
+def test_neighbor_table():
+    # The precomputed neighbor table must agree with the plain bounds/wall checks
+    for maze_path in ["maps/single/tinyMaze.txt", "maps/single/bigMaze.txt", "maps/multi/openSearch.txt"]:
+        maze = Maze(maze_path)
+        rows, cols = maze.getDimensions()
+        for row in range(rows):
+            for col in range(cols):
+                expected = [(r, c) for r, c in [(row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1)]
+                            if maze.isValidMove(r, c)]
+                assert maze.getNeighbors(row, col) == expected
+                assert maze.getNeighborIds(row * cols + col) == [r * cols + c for r, c in expected]
+        assert maze.getStatesExplored() == 2 * rows * cols
+
+
+def test_loader_layouts(tmp_path):
+    # The memory-mapped fast path and the line-by-line fallback must agree
+    layouts = {
+        "plain.txt": b"%%%%\n%P.%\n%. %\n%%%%\n",
+        "no_newline.txt": b"%%%%\n%P.%\n%. %\n%%%%",
+        "crlf.txt": b"%%%%\r\n%P.%\r\n%. %\r\n%%%%\r\n",
+        "blank_lines.txt": b"\n%%%%\n%P.%\n    \n%. %\n%%%%\n\n",
+    }
+    for name, data in layouts.items():
+        maze_path = tmp_path / name
+        maze_path.write_bytes(data)
+        maze = Maze(str(maze_path))
+        assert maze.getDimensions() == (4, 4)
+        assert maze.getStart() == (1, 1)
+        assert maze.getObjectives() == [(1, 2), (2, 1)]
+        assert maze.mazeRaw[2] == ['%', '.', ' ', '%']
+
+    raw = maze.mazeRaw
+    assert maze.mazeRaw is raw #cached until a wall changes
+    maze.setWall(2, 2)
+    assert maze.mazeRaw is not raw and maze.mazeRaw[2] == ['%', '.', '%', '%']
+
+    ragged = tmp_path / "ragged.txt"
+    ragged.write_bytes(b"%%%%\n%P.%\n%%%\n")
+    try:
+        Maze(str(ragged))
+    except SystemExit:
+        pass
+    else:
+        assert False, "ragged maze was accepted"
+
+
+def test_compiled_roundtrip(tmp_path):
+    for maze_path in ["maps/single/bigMaze.txt", "maps/multi/bigSearch.txt", "maps/corner/tinyCorners.txt"]:
+        maze = Maze(maze_path)
+        for with_adjacency in (False, True):
+            compiled_path = str(tmp_path / "maze.mzc")
+            maze.save_compiled(compiled_path, with_adjacency)
+            compiled = Maze.load_compiled(compiled_path)
+            assert compiled.getDimensions() == maze.getDimensions()
+            assert compiled.getStart() == maze.getStart()
+            assert compiled.getObjectives() == maze.getObjectives()
+            assert compiled.mazeRaw == maze.mazeRaw
+            assert bfs(compiled) == bfs(maze)
+
+    # a file from another format version must be rejected, not misread
+    data = bytearray(open(compiled_path, "rb").read())
+    data[4] += 1
+    (tmp_path / "stale.mzc").write_bytes(bytes(data))
+    try:
+        Maze.load_compiled(str(tmp_path / "stale.mzc"))
+    except ValueError:
+        pass
+    else:
+        assert False, "stale compiled maze was accepted"
+
+    # so must a truncated one, in every section, and compile_maps writes it again
+    data = open(compiled_path, "rb").read()
+    rows, cols = maze.getDimensions()
+    for cut in (34, len(data) - rows * cols - 2, len(data) - 1): #objectives, walls, neighbor table
+        (tmp_path / "cut.mzc").write_bytes(data[:cut])
+        try:
+            Maze.load_compiled(str(tmp_path / "cut.mzc"))
+        except ValueError as e:
+            assert "truncated" in str(e)
+        else:
+            assert False, "truncated compiled maze was accepted"
+    (tmp_path / "maps").mkdir()
+    (tmp_path / "maps" / "tiny.txt").write_bytes(open("maps/single/tinyMaze.txt", "rb").read())
+    (tmp_path / "maps" / "tiny.mzc").write_bytes(data[:40])
+    assert compile_maps(str(tmp_path / "maps")) == [str(tmp_path / "maps" / "tiny.mzc")]
+
+
+def test_search_many(tmp_path):
+    mazes = ["maps/single/tinyMaze.txt", "maps/single/smallMaze.txt", "maps/single/bigMaze.txt"]
+    jobs = [(maze_path, method) for maze_path in mazes for method in ("bfs", "astar")]
+    results = {(r.filename, r.method): r for r in search_many(jobs, workers=2)}
+    assert set(results) == set(jobs)
+    for maze_path in mazes:
+        maze = Maze(maze_path)
+        path = bfs(maze)
+        assert results[(maze_path, "bfs")].path_length == len(path)
+        assert results[(maze_path, "bfs")].states_explored == maze.getStatesExplored()
+        assert results[(maze_path, "astar")].path_length == len(path)
+        assert results[(maze_path, "astar")].validation == "Valid"
+
+    ragged = tmp_path / "ragged.txt"
+    ragged.write_bytes(b"%%%%\n%P.%\n%%%\n")
+    broken = list(search_many([(str(ragged), "bfs")], workers=1))
+    assert broken[0].validation == "Maze could not be loaded"
+    # a missing file or a failing search is reported, and the other jobs still come back
+    jobs = [(str(tmp_path / "missing.txt"), "bfs"), ("maps/single/tinyMaze.txt", "bfs"), ("maps/single/tinyMaze.txt", "dfs")]
+    results = {(r.filename, r.method): r.validation for r in search_many(jobs, workers=1)}
+    assert results[jobs[0]].startswith("Maze could not be loaded: FileNotFoundError")
+    assert results[jobs[1]] == "Valid"
+    assert results[jobs[2]].startswith("Search failed: TypeError")
+
+def test_objective_distances():
+    for maze_path in ["maps/multi/tinySearch.txt", "maps/corner/mediumCorners.txt"]:
+        matrix = objective_distances(Maze(maze_path))
+        assert matrix.size == len(Maze(maze_path).getObjectives()) + 1
+        for i, a in enumerate(matrix.points):
+            assert matrix.get(i, i) == 0
+            for b in matrix.points[i + 1:]:
+                maze = Maze(maze_path)
+                maze.setStart(a)
+                maze.setObjectives([b])
+                assert matrix.between(a, b) == matrix.between(b, a) == len(bfs(maze)) - 1
+        # the second request for the same map is served from the cache
+        maze = Maze(maze_path)
+        assert objective_distances(maze) is matrix
+        assert maze.getStatesExplored() == 0
+
+
+def test_astar_multi():
+    # optimal path lengths (including the start) of the bundled multi-objective maps
+    expected = {
+        "maps/corner/tinyCorners.txt": 29,
+        "maps/corner/mediumCorners.txt": 107,
+        "maps/corner/bigCorners.txt": 163,
+        "maps/multi/tinySearch.txt": 28,
+        "maps/multi/smallSearch.txt": 35,
+        "maps/multi/greedySearch.txt": 17,
+    }
+    for maze_path, length in expected.items():
+        maze = Maze(maze_path)
+        path = astar_corner(maze) if "corner" in maze_path else astar_multi(maze)
+        assert len(path) == length
+        assert maze.isValidPath(path) == "Valid"
+
+
+def test_fast_anytime():
+    for maze_path in ["maps/multi/bigSearch.txt", "maps/multi/oddSearch.txt", "maps/corner/mediumCorners.txt"]:
+        maze = Maze(maze_path)
+        lengths = []
+        for path in fast_anytime(maze, time_budget=0.5):
+            assert maze.isValidPath(path) == "Valid"
+            lengths.append(len(path))
+        assert lengths == sorted(set(lengths), reverse=True)
+        # with no improvement budget the greedy tour comes back as is
+        greedy = fast(Maze(maze_path), node_budget=0)
+        assert len(greedy) == lengths[0]
+
+
+def test_bidirectional():
+    # meeting in the middle must still give shortest paths, between random cells too
+    import random
+    rng = random.Random(0)
+    for maze_path in ["maps/single/bigMaze.txt", "maps/single/openMaze.txt", "maps/multi/bigSearch.txt"]:
+        maze = Maze(maze_path)
+        free = [(r, c) for r in range(maze.rows) for c in range(maze.cols) if not maze.isWall(r, c)]
+        queries = [(maze.getStart(), maze.getObjectives()[0])] + [tuple(rng.sample(free, 2)) for _ in range(20)]
+        for start, goal in queries:
+            lengths = []
+            for method in (bfs, bidirectional_bfs, bidirectional_astar):
+                maze = Maze(maze_path)
+                maze.setStart(start)
+                maze.setObjectives([goal])
+                path = method(maze)
+                assert maze.isValidPath(path) == "Valid"
+                assert maze.getStatesExplored() > 0
+                lengths.append(len(path))
+            assert len(set(lengths)) == 1
+
+
+def test_jps():
+    import random
+    rng = random.Random(1)
+    for maze_path in ["maps/single/openMaze.txt", "maps/single/bigMaze.txt", "maps/multi/openSearch.txt"]:
+        maze = Maze(maze_path)
+        free = [(r, c) for r in range(maze.rows) for c in range(maze.cols) if not maze.isWall(r, c)]
+        queries = [(maze.getStart(), maze.getObjectives()[0])] + [tuple(rng.sample(free, 2)) for _ in range(30)]
+        for start, goal in queries:
+            maze.setStart(start)
+            maze.setObjectives([goal])
+            expected = len(bfs(maze))
+            for method in (jps, jps_plus):
+                path = method(maze)
+                assert len(path) == expected
+                assert maze.isValidPath(path) == "Valid"
+        # the JPS+ table is built once per maze and reused
+        assert jump_table(maze) is jump_table(maze)
+
+    maze = Maze("maps/single/openMaze.txt")
+    astar(maze)
+    astar_explored = maze.getStatesExplored()
+    maze = Maze("maps/single/openMaze.txt")
+    jps(maze)
+    assert maze.getStatesExplored() * 10 < astar_explored
+
+
+def test_search_context():
+    import random
+    rng = random.Random(2)
+    maze = Maze("maps/single/bigMaze.txt")
+    start, objectives = maze.getStart(), maze.getObjectives()
+    free = [(r, c) for r in range(maze.rows) for c in range(maze.cols) if not maze.isWall(r, c)]
+    context = SearchContext(maze)
+    for query in range(60):
+        if query == 30:
+            context.generation = 0xFFFFFFFF  # the next query has to wrap the stamps around
+        a, b = rng.sample(free, 2)
+        bfs_path, astar_path = context.bfs(a, b), context.astar(a, b)
+        assert maze.getStart() == start and maze.getObjectives() == objectives
+
+        reference = Maze("maps/single/bigMaze.txt")
+        reference.setStart(a)
+        reference.setObjectives([b])
+        assert len(bfs_path) == len(astar_path) == len(bfs(reference))
+        assert reference.isValidPath(bfs_path) == reference.isValidPath(astar_path) == "Valid"
+
+
+def test_is_valid_path_messages():
+    maze = Maze("maps/multi/tinySearch.txt")
+    path = astar_multi(maze)
+    assert maze.isValidPath(path) == "Valid"
+    assert maze.isValidPath(tuple(path)) == "path must be list"
+    assert maze.isValidPath([]) == "path must not be empty"
+    assert maze.isValidPath(path[:1] + path[2:]) == "Not single hop"
+    assert maze.isValidPath(path + [path[-2], path[-3]]) == "Last position is not goal"
+    assert maze.isValidPath(path[:5]) == "Not all goals passed"
+    # stepping out and back with no objective in between is wasted
+    detour = path[:1] + [path[1], path[0]] + path[1:]
+    assert maze.isValidPath(detour) == "Unnecessary path detected"
+    # walking the path forward, back and forward again revisits every cell,
+    # but always with an objective in between
+    assert maze.isValidPath(path + path[-2::-1] + path[1:]) == "Valid"
+
+
+def test_objective_accessors():
+    maze = Maze("maps/multi/tinySearch.txt")
+    objectives = maze.getObjectives()
+    assert maze.getObjectivesView() == tuple(objectives)
+    assert maze.getObjectiveSet() == frozenset(objectives)
+    assert all(maze.isObjective(*p) for p in objectives)
+
+    objectives.pop()  # changing the returned list must not touch the maze
+    assert len(maze.getObjectives()) == len(objectives) + 1
+
+    new_objectives = [(1, 1), (5, 7)]
+    maze.setObjectives(new_objectives)
+    new_objectives.append((1, 2))
+    assert maze.getObjectives() == [(1, 1), (5, 7)]
+    assert maze.getObjectivesView() == ((1, 1), (5, 7))
+    assert maze.isObjective(5, 7) and not maze.isObjective(1, 2)
+
+
+def test_render_png(tmp_path):
+    import struct
+    import zlib
+    from render import render_png
+    maze = Maze("maps/single/tinyMaze.txt")
+    path = astar(maze)
+    out = tmp_path / "tiny.png"
+    render_png(maze, path, str(out), scale=4)
+
+    data = out.read_bytes()
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", data[16:24])
+    assert (width, height) == (7 * 4, 7 * 4)
+    chunks, pos = {}, 8
+    while pos < len(data):
+        length, = struct.unpack(">I", data[pos:pos + 4])
+        chunks[data[pos + 4:pos + 8]] = data[pos + 8:pos + 8 + length]
+        pos += length + 12
+    palette = chunks[b"PLTE"]
+    raw = zlib.decompress(chunks[b"IDAT"])
+
+    def color(x, y):
+        index = raw[y * (width + 1) + 1 + x]
+        return tuple(palette[3 * index:3 * index + 3])
+
+    assert color(0, 0) == (0, 0, 0)          # wall corner
+    assert color(5 * 4, 1 * 4) == (255, 0, 0)  # first path cell, left of the start square
+    assert color(5 * 4 + 2, 1 * 4 + 2) == (0, 0, 255)  # start square
+    assert color(1 * 4 + 2, 5 * 4 + 2) == (0, 0, 0)    # objective dot
+
+
+def test_agent_changed_cells():
+    from agent import Agent
+    maze = Maze("maps/single/tinyMaze.txt")
+    agent = Agent(maze.getStart(), maze, 20, 20)
+    assert agent.update() == [(1, 5), (1, 5)]
+    assert agent.update() == []  # nothing moved, nothing to redraw
+    agent.moveRight()  # (1, 6) is a wall, so this one doesn't count
+    agent.moveLeft()
+    agent.moveLeft()
+    assert agent.update() == [(1, 5), (1, 4), (1, 3)]
+    assert (agent.lastRow, agent.lastCol) == (1, 4)
+
+
+def test_corridor_graph(tmp_path):
+    # Shortest paths on the pruned, contracted graph, with far fewer expansions on corridor mazes
+    import random
+    rng = random.Random(2)
+    for maze_path in ["maps/single/bigMaze.txt", "maps/single/openMaze.txt", "maps/multi/mediumSearch.txt"]:
+        maze = Maze(maze_path)
+        maze.setObjectives(maze.getObjectives()[:1])
+        path = corridor_astar(maze)
+        reference = Maze(maze_path)
+        reference.setObjectives(reference.getObjectives()[:1])
+        assert len(path) == len(astar(reference)) and reference.isValidPath(path) == "Valid"
+        assert maze.getStatesExplored() <= reference.getStatesExplored()
+        graph = corridor_graph(maze)
+        assert corridor_graph(maze) is graph
+        rows, cols = maze.getDimensions()
+        free = [(r, c) for r in range(rows) for c in range(cols) if not maze.isWall(r, c)]
+        for _ in range(10):
+            start, goal = rng.sample(free, 2)
+            maze.setStart(start)
+            maze.setObjectives([goal])
+            path = corridor_astar(maze)
+            assert len(path) == len(bfs_path(maze, start, goal)) and maze.isValidPath(path) == "Valid"
+        assert corridor_graph(maze) is graph #new start and objective, same walls, same graph
+        maze.setWall(*next(cell for cell in free if cell not in (start, goal)))
+        assert corridor_graph(maze) is not graph
+    # bigMaze is a perfect maze: all of it is pruned, and the path is where the two climbs meet
+    maze = Maze("maps/single/bigMaze.txt")
+    assert len(corridor_astar(maze)) == len(bfs(Maze("maps/single/bigMaze.txt")))
+    graph = corridor_graph(maze)
+    assert graph.nodes == 0 and graph.pruned == maze.getWallMask().count(0) and maze.getStatesExplored() == 0
+    # a loop with no junction on it, and a separate part that can't be reached
+    (tmp_path / "loop.txt").write_text("%%%%%%%\n%P    %\n% %%% %\n%     %\n%%%%%%%\n%.  % %\n%%%%%%%\n")
+    maze = Maze(str(tmp_path / "loop.txt"))
+    assert corridor_astar(maze) == []
+    for start, goal in [((1, 1), (3, 5)), ((3, 3), (1, 2)), ((1, 3), (1, 4))]:
+        maze.setStart(start)
+        maze.setObjectives([goal])
+        assert len(corridor_astar(maze)) == len(bfs_path(maze, start, goal))
+
+
+def test_bucket_queue():
+    # Lowest priority first, latest pushed first on ties, decrease-key moves the cell
+    queue = BucketQueue()
+    for cell, priority in [(10, 5), (11, 3), (12, 5), (13, 3), (14, 7)]:
+        queue.push(cell, priority)
+    queue.push(14, 3) #decrease-key: no stale entry left at 7
+    queue.push(12, 4)
+    assert len(queue) == 5 and 14 in queue and queue.min_priority() == 3
+    order = []
+    while queue:
+        order.append((queue.pop(), queue.low))
+    assert order == [(14, 3), (13, 3), (11, 3), (12, 4), (10, 5)]
+    queue.push(1, 9)
+    queue.push(2, 2) #below everything popped so far
+    assert [queue.pop(), queue.pop()] == [2, 1]
+    try:
+        queue.pop()
+    except IndexError:
+        pass
+    else:
+        assert False, "popped from an empty queue"
+    # A star keeps shortest paths and expands less with deepest-g tie-breaking than plain BFS
+    for maze_path in ["maps/single/openMaze.txt", "maps/single/bigMaze.txt"]:
+        maze, reference = Maze(maze_path), Maze(maze_path)
+        assert len(astar(maze)) == len(bfs(reference))
+        assert maze.getStatesExplored() < reference.getStatesExplored()
+
+
+def test_search_steps():
+    for maze_path in ["maps/single/bigMaze.txt", "maps/single/openMaze.txt"]:
+        for method in (bfs, astar):
+            maze = Maze(maze_path)
+            path = method(maze)
+            stepped = Maze(maze_path)
+            steps = list(search_steps(stepped, method.__name__, batch_size=32))
+            assert steps[-1].path == path
+            assert all(step.path is None for step in steps[:-1])
+            assert all(len(step.expanded) == 32 for step in steps[:-1])
+            assert stepped.getStatesExplored() == maze.getStatesExplored()
+
+
+def test_search_stats():
+    # Stats are opt-in: same path and states explored with or without them
+    for method in ["bfs", "astar", "jps"]:
+        plain = Maze("maps/single/bigMaze.txt")
+        path = search(plain, method)
+        maze = Maze("maps/single/bigMaze.txt")
+        counted, stats = search(maze, method, stats=True)
+        assert counted == path
+        assert stats.method == method
+        assert stats.path_length == len(path)
+        assert stats.states_explored == plain.getStatesExplored()
+        assert stats.total_time > 0 and stats.peak_memory > 0
+        json.dumps(stats.to_dict())
+    methods = {"bfs": bfs, "astar": astar, "bidirectional_bfs": bidirectional_bfs, "bidirectional_astar": bidirectional_astar,
+               "jps": jps, "jps_plus": jps_plus, "corridor": corridor_astar, "astar_multi": astar_multi, "fast": fast}
+    maps = {"astar_multi": "maps/multi/smallSearch.txt", "fast": "maps/multi/smallSearch.txt", "corridor": "maps/single/openMaze.txt"}
+    for method, function in methods.items():
+        maze = Maze(maps.get(method, "maps/single/bigMaze.txt"))
+        stats = SearchStats(method)
+        path = function(maze, stats=stats)
+        if method != "astar_multi": #its expansions are objective graph states, not maze cells
+            assert stats.nodes_expanded == maze.getStatesExplored()
+        assert stats.nodes_expanded >= 1
+        assert stats.nodes_generated >= stats.nodes_expanded
+        assert stats.duplicates_skipped >= 0
+        assert stats.peak_frontier >= 1
+        assert stats.neighbor_time > 0
+        assert method in ("bfs", "bidirectional_bfs", "fast") or stats.heuristic_time > 0
+    # the BFS searches count every neighbor that isn't new as a duplicate
+    stats = search(Maze("maps/single/openMaze.txt"), "bidirectional_bfs", stats=True)[1]
+    assert stats.duplicates_skipped > 0 and stats.peak_frontier > 1
+    assert search(Maze("maps/single/bigMaze.txt"), "jps", stats=True)[1].nodes_expanded > 0
+
+
+def test_benchmark_helpers(tmp_path):
+    # Synthetic grids are solvable, the runner handles bad maps, and compare flags regressions
+    from benchmark import compare, run_case, synthetic_cases
+    cases = synthetic_cases(str(tmp_path), ["fast"], [("perfect", 21, 31)], seed=3)
+    assert [name for name, _, _ in cases] == ["synthetic/perfect21x31-1.txt", "synthetic/perfect21x31-4.txt"]
+    filename = cases[1][1]
+
+    record = run_case(filename, "fast", 3)
+    assert record["status"] == "ok" and record["runs"] == 3 and record["p95"] >= record["median"]
+    # every timed run rebuilds the distance matrix, the warm second search reuses it
+    assert record["warm_median"] < record["median"]
+    assert run_case(filename, "bfs", 1) == {"status": "skipped"}
+    ragged = tmp_path / "ragged.txt"
+    ragged.write_text("%%%%\n%P.%\n%%\n")
+    assert run_case(str(ragged), "bfs", 1) == {"status": "malformed"}
+
+    old = {"a": dict(record), "b": dict(record), "c": dict(record)}
+    new = {"a": dict(record, median=record["median"] + 1), "b": dict(record, path_length=record["path_length"] + 2),
+           "c": {"status": "timeout"}}
+    assert [case for case, _ in compare(new, old)] == ["a", "b", "c"]
+    assert compare(old, old) == []
+
+
+def test_mazegen(tmp_path):
+    # Generated mazes load, are reproducible, and perfect/rooms ones are connected
+    from mazegen import maze_rows, write_maze
+    for style, rows, cols in [("perfect", 41, 60), ("rooms", 50, 41), ("open", 30, 30)]:
+        filename = write_maze(str(tmp_path / (style + ".txt")), rows, cols, style, objectives=5, seed=7)
+        maze = Maze(filename)
+        assert maze.getDimensions() == (rows, cols) and len(maze.getObjectives()) == 5
+        assert list(maze_rows(rows, cols, style, objectives=5, seed=7)) == open(filename).read().splitlines()
+        if style != "open":
+            distances = bfs_distances(maze, maze.getStart())
+            assert all(distances[row * cols + col] >= 0 for row, col in maze.getObjectives())
+    # density 1.0 is a perfect maze: every open cell reachable, exactly one route between cells
+    maze = Maze(write_maze(str(tmp_path / "tree.txt"), 41, 41, "perfect", 1.0, seed=1))
+    open_cells = [cell for cell, wall in enumerate(maze.getWallMask()) if not wall]
+    assert sum(len(maze.getNeighborIds(cell)) for cell in open_cells) == 2 * (len(open_cells) - 1)
+    distances = bfs_distances(maze, maze.getStart())
+    assert all(distances[cell] >= 0 for cell in open_cells)
+    try:
+        list(maze_rows(5, 5, "perfect", objectives=4))
+    except ValueError:
+        pass
+    else:
+        assert False, "a 2x2-cell maze took a start and 4 objectives"
+
+
+def test_heuristic_cache(tmp_path):
+    # Exact fields and ALT bounds keep astar optimal; exact ones only expand the path on bigMaze
+    for maze_path in ["maps/single/bigMaze.txt", "maps/single/openMaze.txt", "maps/single/smallMaze.txt"]:
+        plain = Maze(maze_path)
+        expected = len(astar(plain))
+        maze = Maze(maze_path)
+        cache = HeuristicCache(maze, promote_after=2)
+        assert len(astar(maze, cache=cache)) == expected #first query: ALT
+        assert cache.misses == 1 and not cache.fields and len(cache.landmarks) == 4
+        assert len(astar(maze, cache=cache)) == expected #second query: field gets built
+        before = maze.getStatesExplored()
+        path = astar(maze, cache=cache)
+        assert len(path) == expected and cache.hits == 1
+        if maze_path.endswith("bigMaze.txt"):
+            assert maze.getStatesExplored() - before == len(path) - 1
+    maze = Maze("maps/single/bigMaze.txt")
+    assert heuristic_cache(maze) is heuristic_cache(maze)
+
+    # LRU eviction under the memory cap: room for 3 fields, 1 of them a landmark
+    rows, cols = maze.getDimensions()
+    cache = HeuristicCache(maze, max_bytes=3 * 4 * rows * cols, landmarks=1, promote_after=1)
+    for goal in [(1, 1), (5, 5), (1, 1), (7, 7)]:
+        cache.heuristic(goal)
+    assert list(cache.fields) == [(1, 1), (7, 7)]
+    cache.heuristic((3, 3))
+    assert list(cache.fields) == [(7, 7), (3, 3)]
+    assert cache.memory() <= 3 * 4 * rows * cols
+
+    # A start the goal's field doesn't reach is answered without searching
+    walled = tmp_path / "walled.txt"
+    walled.write_text("%%%%%%%\n%P%  .%\n%%%%%%%\n")
+    maze = Maze(str(walled))
+    cache = HeuristicCache(maze, promote_after=1)
+    cache.add(maze.getObjectives()[0])
+    before = maze.getStatesExplored()
+    assert astar(maze, cache=cache) == [] and maze.getStatesExplored() == before
+    assert cache.unreachable(maze.getStart(), (1, 5)) and not cache.unreachable((1, 3), (1, 5))
+
+
+def test_distance_field(tmp_path):
+    # The level-at-a-time field equals bfs_distances, and walking down it gives a bfs-length path
+    for maze_path in ["maps/single/tinyMaze.txt", "maps/single/smallMaze.txt", "maps/single/openMaze.txt",
+                      "maps/single/bigMaze.txt", "maps/multi/openSearch.txt"]:
+        maze = Maze(maze_path)
+        field = distance_field(maze, maze.getObjectives()[0])
+        assert field == bfs_distances(maze, maze.getObjectives()[0])
+        path = field_path(maze, field, maze.getStart())
+        assert path[-1] == maze.getObjectives()[0]
+        if maze_path.startswith("maps/single"):
+            assert len(path) == len(bfs(Maze(maze_path)))
+            assert maze.isValidPath(path) == "Valid"
+    # Open borders (no wrap-around between rows) and unreachable cells
+    filename = tmp_path / "edges.txt"
+    filename.write_text("P  %  \n %%%  \n   % .\n")
+    maze = Maze(str(filename))
+    field = distance_field(maze, (0, 0))
+    assert field == bfs_distances(maze, (0, 0))
+    assert field[2 * 6 + 5] == -1 and field_path(maze, field, (2, 5)) == []
+
+
+def test_mutable_walls(tmp_path):
+    # setWall/clearWall patch the neighbor table and notify listeners like a fresh load would
+    maze = Maze("maps/single/openMaze.txt")
+    rows, cols = maze.getDimensions()
+    key = maze.getGridKey()
+    maze.getNeighbors(1, 1)
+    events = []
+    maze.addWallListener(lambda row, col, isWall: events.append((row, col, isWall)))
+    assert maze.setWall(2, 2) and not maze.setWall(2, 2)
+    assert maze.clearWall(0, 5) and maze.clearWall(2, 2)
+    assert events == [(2, 2, True), (0, 5, False), (2, 2, False)] and maze.getWallVersion() == 3
+    filename = tmp_path / "changed.txt"
+    filename.write_text("".join("".join(row) + "\n" for row in maze.mazeRaw))
+    fresh = Maze(str(filename))
+    assert all(maze.getNeighbors(row, col) == fresh.getNeighbors(row, col) for row in range(rows) for col in range(cols))
+    assert maze.getGridKey() == fresh.getGridKey() != key
+    for cell in [maze.getStart(), maze.getObjectives()[0]]:
+        try:
+            maze.setWall(*cell)
+        except ValueError:
+            pass
+        else:
+            assert False, "a wall went on %s" % (cell,)
+
+
+def test_dstar_lite():
+    # Replans stay shortest after walls change and the start moves, and cost less than the first plan
+    import random
+    rng = random.Random(3)
+    for maze_path in ["maps/single/bigMaze.txt", "maps/single/openMaze.txt"]:
+        maze = Maze(maze_path)
+        rows, cols = maze.getDimensions()
+        planner = DStarLite(maze)
+        assert len(planner.plan()) == len(bfs(Maze(maze_path)))
+        first = planner.expanded
+        for _ in range(20):
+            for _ in range(3):
+                cell = (rng.randrange(1, rows - 1), rng.randrange(1, cols - 1))
+                if cell != maze.getStart() and cell not in maze.getObjectiveSet():
+                    (maze.setWall if rng.random() < 0.5 else maze.clearWall)(*cell)
+            path = planner.plan()
+            assert len(path) == len(bfs_path(maze, maze.getStart(), planner.goal_pos))
+            assert planner.expanded < first
+            if path:
+                assert maze.isValidPath(path) == "Valid"
+                if len(path) > 3:
+                    maze.setStart(path[2])
+        planner.close()
+
+
+def test_path_service():
+    # Concurrent identical queries share one search; answers are cached per wall version
+    import asyncio
+    from service import PathService
+    service = PathService("maps/single/bigMaze.txt")
+    maze = service.maze
+    assert maze.getStatesExplored() == 0 #building the neighbor table isn't an explored state
+    goals = maze.getObjectives()
+    other = (1, 1)
+
+    async def run():
+        paths = await asyncio.gather(*[service.query(maze.getStart(), goals) for _ in range(8)],
+                                     service.query(other, goals, "bfs"))
+        assert all(path == paths[0] for path in paths[:8])
+        assert len(paths[0]) == len(bfs(Maze("maps/single/bigMaze.txt")))
+        assert len(paths[8]) == len(bfs_path(maze, other, goals[0]))
+        assert await service.query(maze.getStart(), goals) == paths[0]
+        metrics = service.metrics()
+        assert (metrics["searches"], metrics["coalesced"], metrics["cache_hits"]) == (2, 7, 1)
+        assert metrics["queue_depth"] == 0 and metrics["latency_max"] >= metrics["latency_p50"]
+
+        path = paths[0]
+        maze.setWall(*path[len(path) // 2]) #a new wall version: searched again, around the wall
+        rerouted = await service.query(maze.getStart(), goals)
+        assert service.metrics()["searches"] == 3 and path[len(path) // 2] not in rerouted
+        # queries from other starts reuse the worker's copy, and the jump table built on it
+        await service.query(other, goals, "jps_plus")
+        [(version, view)] = service.views.values()
+        table = jump_table(view)
+        assert len(await service.query((1, 3), goals, "jps_plus")) == len(bfs_path(maze, (1, 3), goals[0]))
+        assert list(service.views.values()) == [(version, view)] and jump_table(view) is table
+        try:
+            await service.query(maze.getStart(), goals, "dfs")
+        except ValueError:
+            pass
+        else:
+            assert False, "unknown method was accepted"
+
+    asyncio.run(run())
+    assert maze.getStart() == Maze("maps/single/bigMaze.txt").getStart()
+    service.close()
+
+
+def test_hpa(tmp_path):
+    # Paths are valid and close to shortest; per-cluster rebuilds match a fresh build; saves load back
+    import random
+    from hpa import Abstraction
+    from mazegen import write_maze
+    rng = random.Random(5)
+    for maze_path in ["maps/single/bigMaze.txt", "maps/single/openMaze.txt",
+                      write_maze(str(tmp_path / "narrow.txt"), 39, 6, "perfect", 0.9, seed=4), #one column of blocks
+                      write_maze(str(tmp_path / "rooms.txt"), 81, 81, "rooms", seed=2)]:
+        maze = Maze(maze_path)
+        rows, cols = maze.getDimensions()
+        abstraction = Abstraction(maze, 8)
+        for pairs in abstraction.transitions.values(): #entrances are one step apart, across the border
+            for x, y in pairs:
+                assert manhattan_distance(divmod(x, cols), divmod(y, cols)) == 1
+                assert abstraction.cluster_of(x) != abstraction.cluster_of(y)
+        open_cells = [divmod(cell, cols) for cell, wall in enumerate(maze.getWallMask()) if not wall]
+        for _ in range(10):
+            start, goal = rng.choice(open_cells), rng.choice(open_cells)
+            path = abstraction.path(start, goal)
+            shortest = bfs_path(maze, start, goal)
+            assert len(shortest) <= len(path) <= 1.1 * len(shortest)
+            if path:
+                assert path[0] == start and path[-1] == goal
+                assert all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 and not maze.isWall(*b) for a, b in zip(path, path[1:]))
+
+    abstraction.watch()
+    walled = [cell for cell in rng.sample(open_cells, 30) if cell != maze.getStart() and cell not in maze.getObjectiveSet()]
+    for cell in walled:
+        maze.setWall(*cell)
+    abstraction.update()
+    fresh = Abstraction(maze, 8)
+    assert abstraction.transitions == fresh.transitions
+    assert [{node: sorted(hops) for node, hops in edges.items()} for edges in abstraction.edges] == \
+        [{node: sorted(hops) for node, hops in edges.items()} for edges in fresh.edges]
+    abstraction.close()
+
+    abstraction.save(str(tmp_path / "rooms.hpa"))
+    loaded = Abstraction.load(str(tmp_path / "rooms.hpa"), maze)
+    assert loaded.path() == abstraction.path()
+    maze.clearWall(*walled[0])
+    try:
+        Abstraction.load(str(tmp_path / "rooms.hpa"), maze)
+    except ValueError:
+        pass
+    else:
+        assert False, "an abstraction for other walls was accepted"
+
+
 if __name__ == "__main__":
     mazes = [
         "maps/single/tinyMaze.txt",
@@ -47,6 +732,18 @@ if __name__ == "__main__":
         "maps/single/bigMaze.txt",
     ]
     
+    if "--json" in sys.argv: #one JSON stats record per (maze, method), nothing else on stdout
+        for maze_path in mazes:
+            for method_name in ["bfs", "astar"]:
+                try:
+                    with contextlib.redirect_stdout(sys.stderr): #Maze prints its load errors
+                        maze = Maze(maze_path)
+                except SystemExit: #malformed map
+                    continue
+                path, stats = search(maze, method_name, stats=True)
+                print(json.dumps(dict(stats.to_dict(), filename=maze_path, valid=Maze(maze_path).isValidPath(path))))
+        sys.exit(0)
+    
     for maze_path in mazes:
         try:
             print(f"\n\n{'#'*60}")